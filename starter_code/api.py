@@ -0,0 +1,198 @@
+from flask import Blueprint, abort, current_app, jsonify, request, stream_with_context
+from models import db, Venue, Artist, Show
+from exporter import MODELS as EXPORT_MODELS, FORMATS as EXPORT_FORMATS, export_stream
+from queries import (venue_areas, artist_list, search_by_name, show_filters, shows_page, genre_filters,
+                     genre_facets, datetime_arg, booked_shows, venue_page, artist_page, fingerprint, table_version, venue_version, artist_version)
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+#----------------------------------------------------------------------------#
+# Helpers.
+#----------------------------------------------------------------------------#
+
+def conditional_json(etag, build):
+  #Answer 304 from the ETag alone when the client's copy is current, so the
+  #body is only built and serialized when something actually changed. Weak
+  #comparison, since a compressed response carries the tag as W/"..."
+  if request.if_none_match.contains_weak(etag):
+      response = current_app.response_class(status=304)
+  else:
+      response = jsonify(build())
+
+  response.set_etag(etag)
+  response.headers['Cache-Control'] = 'no-cache'
+  return response
+
+def isoformat_shows(shows):
+  return [dict(show, start_time=show['start_time'] and show['start_time'].isoformat()) for show in shows]
+
+def isoformat_times(show):
+  return dict(show, start_time=show['start_time'].isoformat(), end_time=show['end_time'].isoformat())
+
+def detail_json(data):
+  return dict(
+    data,
+    past_shows=isoformat_shows(data['past_shows']),
+    upcoming_shows=isoformat_shows(data['upcoming_shows'])
+  )
+
+def availability(model, column, row_id):
+  #Is the venue or artist free for the whole of [start, end)? Not cached:
+  #it is meant to be asked right before booking
+  start = datetime_arg(request.args, 'start')
+  end = datetime_arg(request.args, 'end')
+  if start is None or end is None or end <= start:
+      abort(400, description='start and end are required, with end after start.')
+  if db.session.query(model.id).filter(model.id == row_id).scalar() is None:
+      abort(404)
+
+  conflicts = booked_shows(column, row_id, start, end)
+  return jsonify({
+    "start": start.isoformat(),
+    "end": end.isoformat(),
+    "available": not conflicts,
+    "conflicts": [isoformat_times(show) for show in conflicts]
+  })
+
+@api.errorhandler(400)
+@api.errorhandler(404)
+def json_error(error):
+  return jsonify({"error": error.name, "description": error.description}), error.code
+
+#----------------------------------------------------------------------------#
+# Endpoints.
+#----------------------------------------------------------------------------#
+
+@api.route('/venues')
+def venues():
+  filters = genre_filters(request.args)
+  return conditional_json(
+    fingerprint('venues', filters, table_version(Venue)),
+    lambda: {"areas": list(venue_areas(**filters))}
+  )
+
+@api.route('/venues/<int:venue_id>')
+def venue(venue_id):
+  #Built from the database rather than the detail cache: the ETag comes from
+  #the live rows, and a cached page can lag behind them (another worker's
+  #LocalCache, or counters rolled forward by sweep-shows)
+  return conditional_json(
+    venue_version(venue_id),
+    lambda: detail_json(venue_page(venue_id))
+  )
+
+@api.route('/venues/<int:venue_id>/availability')
+def venue_availability(venue_id):
+  return availability(Venue, Show.venue_id, venue_id)
+
+@api.route('/artists')
+def artists():
+  filters = genre_filters(request.args)
+  return conditional_json(
+    fingerprint('artists', filters, table_version(Artist)),
+    lambda: {"artists": list(artist_list(**filters))}
+  )
+
+@api.route('/artists/<int:artist_id>')
+def artist(artist_id):
+  return conditional_json(
+    artist_version(artist_id),
+    lambda: detail_json(artist_page(artist_id))
+  )
+
+@api.route('/artists/<int:artist_id>/availability')
+def artist_availability(artist_id):
+  return availability(Artist, Show.artist_id, artist_id)
+
+@api.route('/shows')
+def shows():
+  #Accepts the same filters and keyset cursor as /shows. Which shows count as
+  #upcoming moves with the clock, so this bounded page is read and its
+  #content hashed rather than versioned by table
+  page = {}
+  data = {"shows": isoformat_shows(shows_page(page=page, **show_filters(request.args)))}
+  data["next"] = None
+  if 'after' in page:
+      data["next"] = {"after": page['after'][0].isoformat(), "after_id": page['after'][1]}
+
+  return conditional_json(fingerprint('shows', data), lambda: data)
+
+@api.route('/shows', methods=['POST'])
+def create_shows():
+  #Body: {"shows": [{"artist_id": 1, "venue_id": 2, "start_time": "2030-05-01 20:00:00"}, ...]},
+  #validated like import rows. All shows are inserted in one transaction, or
+  #none are and each failing row's errors come back keyed by its position
+  from importer import create_show_batch
+
+  body = request.get_json(silent=True)
+  records = body.get('shows') if isinstance(body, dict) else None
+  if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+      abort(400, description='Expected a JSON object with a "shows" list of objects.')
+  if len(records) > current_app.config['SHOW_BATCH_MAX_ROWS']:
+      abort(400, description=f"At most {current_app.config['SHOW_BATCH_MAX_ROWS']} shows per request.")
+
+  try:
+      result = create_show_batch(list(enumerate(records)))
+  finally:
+      db.session.close()
+
+  if result.errors:
+      return jsonify({"errors": [{"row": row, "errors": errors} for row, errors in result.errors]}), 422
+  return jsonify({"ids": result.ids}), 201
+
+@api.route('/search/venues')
+def search_venues():
+  search_term = request.args.get('q', '')
+  filters = genre_filters(request.args)
+  return conditional_json(
+    fingerprint('search', search_term, filters, table_version(Venue)),
+    lambda: search_by_name(Venue, search_term, **filters)
+  )
+
+@api.route('/search/artists')
+def search_artists():
+  search_term = request.args.get('q', '')
+  filters = genre_filters(request.args)
+  return conditional_json(
+    fingerprint('search', search_term, filters, table_version(Artist)),
+    lambda: search_by_name(Artist, search_term, **filters)
+  )
+
+@api.route('/autocomplete/<kind>')
+def autocomplete(kind):
+  #Type-ahead suggestions for ?q=, answered from memory without a query
+  #(apart from the periodic staleness check)
+  from autocomplete import KINDS as AUTOCOMPLETE_KINDS
+  if kind not in AUTOCOMPLETE_KINDS:
+      abort(404)
+
+  limit = min(request.args.get('limit', 10, type=int), current_app.config['AUTOCOMPLETE_MAX_RESULTS'])
+  results = current_app.extensions['autocomplete'].search(kind, request.args.get('q', ''), limit)
+  return jsonify({"results": [{"id": row_id, "name": name} for row_id, name in results]})
+
+@api.route('/genres/<kind>')
+def genres(kind):
+  #Facet counts, e.g. {"genre": "Jazz", "count": 412} for /genres/venues
+  if kind not in ('venues', 'artists'):
+      abort(404)
+  data = {"genres": genre_facets(kind)}
+  return conditional_json(fingerprint('genres', data), lambda: data)
+
+@api.route('/export/<kind>')
+def export(kind):
+  #Streams a whole table as CSV (default) or NDJSON, optionally gzipped,
+  #resuming after ?after_id= when given
+  file_format = request.args.get('format', 'csv')
+  if kind not in EXPORT_MODELS or file_format not in EXPORT_FORMATS:
+      abort(404)
+
+  compress = request.args.get('gzip') == '1'
+  chunks = export_stream(kind, file_format, request.args.get('after_id', type=int), compress)
+
+  filename = f'{kind}.{file_format}' + ('.gz' if compress else '')
+  response = current_app.response_class(
+    stream_with_context(chunks),
+    mimetype='application/gzip' if compress else EXPORT_FORMATS[file_format]
+  )
+  response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+  return response
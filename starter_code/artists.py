@@ -0,0 +1,148 @@
+from flask import Blueprint, current_app, render_template, request, flash, redirect, url_for
+from models import db, Artist
+from queries import artist_list, search_by_name, artist_page, genre_filters, genre_facets
+from routing import read_only
+from views import render_listing, detail_cache, invalidate_artist
+
+artists_bp = Blueprint('artists', __name__)
+
+#  Artists
+#  ----------------------------------------------------------------
+
+@artists_bp.route('/artists')
+def artists():
+  return render_listing('pages/artists.html', artists=artist_list(**genre_filters(request.args)),
+                        facets=genre_facets('artists'))
+
+@artists_bp.route('/artists/search', methods=['POST'])
+@read_only
+def search_artists():
+  #Case-insensitive partial match, e.g. "band" finds "The Wild Sax Band"
+  search_term = request.form.get('search_term', '')
+  response = search_by_name(Artist, search_term, **genre_filters(request.values))
+
+  return render_template('pages/search_artists.html', results=response, search_term=search_term)
+
+@artists_bp.route('/artists/<int:artist_id>')
+def show_artist(artist_id):
+  # shows the artist page with the given artist_id
+  data = detail_cache().get_or_load(f'artist:{artist_id}', lambda: artist_page(artist_id))
+  return render_template('pages/show_artist.html', artist=data)
+
+#  Update
+#  ----------------------------------------------------------------
+
+@artists_bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+  from forms import ArtistForm
+  form = ArtistForm(request.form, meta={"csrf": False})
+
+  # TODO: populate form with fields from artist with ID <artist_id>
+  artist = Artist.query.get(artist_id)
+  form.name.data = artist.name
+  form.city.data = artist.city
+  form.state.data = artist.state
+  form.phone.data = artist.phone
+  form.genres.data = artist.genres
+  form.image_link.data = artist.image_link
+  form.facebook_link.data = artist.facebook_link
+  form.website_link.data = artist.website_link
+  form.seeking_venue.data = artist.seeking_venue
+  form.seeking_description.data = artist.seeking_description
+
+  return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+@artists_bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+  # TODO: take values from the form submitted, and update existing
+  # artist record with ID <artist_id> using the new attributes
+  from forms import ArtistForm
+  form = ArtistForm(request.form, meta={"csrf": False})
+
+   #First check to see if the form is valid
+  if form.validate():
+         #Get selected artist from database and edit it
+         selected_artist = Artist.query.get(artist_id)
+
+         selected_artist.name = form.name.data
+         selected_artist.city = form.city.data
+         selected_artist.state = form.state.data
+         selected_artist.phone = form.phone.data
+         selected_artist.genres = form.genres.data
+         selected_artist.image_link = form.image_link.data
+         selected_artist.facebook_link = form.facebook_link.data
+         selected_artist.website_link = form.website_link.data
+         selected_artist.seeking_venue = form.seeking_venue.data
+         selected_artist.seeking_description = form.seeking_description.data
+
+         try:
+             db.session.commit()
+             invalidate_artist(artist_id)
+
+     # On unsuccessful db insert, flash an error instead and rollback session
+         except ValueError as e:
+             current_app.logger.error(e)
+             db.session.rollback()
+             flash('An error occurred. Artist could not be updated. ')
+
+         finally:
+             db.session.close()
+  else:
+           #Show errors if form is not valid to help with debugging
+           flash(form.errors)
+
+
+  return redirect(url_for('artists.show_artist', artist_id=artist_id))
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@artists_bp.route('/artists/create', methods=['GET'])
+def create_artist_form():
+  from forms import ArtistForm
+  form = ArtistForm()
+  return render_template('forms/new_artist.html', form=form)
+
+@artists_bp.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+  # called upon submitting the new artist listing form
+  from forms import ArtistForm
+  form = ArtistForm(request.form, meta={"csrf": False})
+  # TODO: insert form data as a new Venue record in the db, instead
+  # TODO: modify data to be the data object returned from db insertion
+
+  #First check to see if the form is valid
+  if form.validate():
+        #Create new artist object with form data
+        newArtist = Artist(
+          name = form.name.data,
+          city = form.city.data,
+          state = form.state.data,
+          phone = form.phone.data,
+          genres = form.genres.data,
+          image_link = form.image_link.data,
+          facebook_link = form.facebook_link.data,
+          website_link = form.website_link.data,
+          seeking_venue = form.seeking_venue.data,
+          seeking_description = form.seeking_description.data
+          )
+
+        try:
+            #Try to add new artist object to the database and commit the session, flash message if successful
+            db.session.add(newArtist)
+            db.session.commit()
+            flash('Artist ' + form.name.data + ' was successfully listed!')
+
+    # On unsuccessful db insert, flash an error instead and rollback session
+        except ValueError as e:
+            current_app.logger.error(e)
+            db.session.rollback()
+            flash('An error occurred. Artist ' + form.name.data + ' could not be listed. ')
+
+        finally:
+            db.session.close()
+  else:
+          #Show errors if form is not valid to help with debugging
+          flash(form.errors)
+
+  return render_template('pages/home.html')
@@ -0,0 +1,187 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+from flask import current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+#----------------------------------------------------------------------------#
+# Build.
+#----------------------------------------------------------------------------#
+
+MANIFEST = 'manifest.json'
+
+# Text formats are worth precompressing; images and woff already are compressed
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.eot', '.ttf', '.otf', '.json', '.txt')
+
+# Content-Encoding of each precompressed variant, by file suffix, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# url(...) references in stylesheets, e.g. url("../fonts/x.woff?v=4#iefix")
+CSS_URL = re.compile(rb'''url\(\s*(['"]?)([^'")?#]+)([^'")]*)\1\s*\)''')
+
+def fingerprinted(name, data):
+  #css/main.css -> css/main.3f2a9c1b0d4e.css
+  root, ext = posixpath.splitext(name)
+  return f'{root}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+
+def rewrite_css_urls(name, data, manifest):
+  #Point relative url()s at the hashed copies, so a stylesheet's hash also
+  #changes when a font or image it uses does
+  directory = posixpath.dirname(name)
+
+  def replace(match):
+      quote, path, suffix = match.groups()
+      target = posixpath.normpath(posixpath.join(directory, path.decode()))
+      if target not in manifest:
+          return match.group(0)
+      hashed = posixpath.relpath(manifest[target], directory or '.').encode()
+      return b'url(' + quote + hashed + suffix + quote + b')'
+
+  return CSS_URL.sub(replace, data)
+
+def compress(data, encoding):
+  if encoding == 'gzip':
+      #mtime=0 keeps the output identical between builds of the same file
+      return gzip.compress(data, compresslevel=9, mtime=0)
+  try:
+      import brotli
+  except ImportError:
+      return None
+  return brotli.compress(data, quality=11)
+
+def build_assets(static_folder, build_dir):
+  '''Copy the static files into build_dir under content-hashed names, with
+  gzip and brotli variants, and write the name mapping to manifest.json.
+
+  Files from earlier builds are left in place so pages rendered before a
+  deploy can still load theirs.
+  '''
+  names = []
+  for root, dirs, files in os.walk(static_folder):
+      dirs[:] = [d for d in dirs if not d.startswith('.')]
+      for filename in files:
+          if not filename.startswith('.'):
+              names.append(os.path.relpath(os.path.join(root, filename), static_folder).replace(os.sep, '/'))
+
+  #Stylesheets go last so their url()s can be pointed at the hashed fonts and images
+  names.sort(key=lambda name: (name.endswith('.css'), name))
+
+  manifest = {}
+  for name in names:
+      with open(os.path.join(static_folder, name), 'rb') as f:
+          data = f.read()
+      if name.endswith('.css'):
+          data = rewrite_css_urls(name, data, manifest)
+
+      hashed = fingerprinted(name, data)
+      path = os.path.join(build_dir, hashed)
+      os.makedirs(os.path.dirname(path), exist_ok=True)
+      _write(path, data)
+
+      #Variants that don't save anything are left out and the file is sent as is
+      if name.endswith(COMPRESSIBLE):
+          for encoding, suffix in ENCODINGS:
+              compressed = compress(data, encoding)
+              if compressed is not None and len(compressed) < len(data):
+                  _write(path + suffix, compressed)
+
+      manifest[name] = hashed
+
+  #Replaced in one step, so a server starting meanwhile reads the old or new manifest
+  _write(os.path.join(build_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+  return manifest
+
+def _write(path, data):
+  partial = path + '.tmp'
+  with open(partial, 'wb') as f:
+      f.write(data)
+  os.replace(partial, path)
+
+#----------------------------------------------------------------------------#
+# Serving.
+#----------------------------------------------------------------------------#
+
+class StaticAssets:
+    '''Serves the build written by `flask fyyur build-assets`.
+
+    url_for('static', filename=...) returns the hashed name of files in the
+    manifest. Hashed files never change, so any file in the build directory,
+    from this build or an earlier one, is sent with a far-future, immutable
+    Cache-Control, precompressed to suit Accept-Encoding. Anything else, and
+    everything in debug mode or before a build, is served from the static
+    folder as usual.
+    '''
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        self.variants = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['static_assets'] = self
+        self.build_dir = app.config['STATIC_BUILD_DIR']
+        self.max_age = app.config['STATIC_MAX_AGE']
+        if app.debug or not self.build_dir:
+            return
+
+        try:
+            with open(os.path.join(self.build_dir, MANIFEST)) as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            return
+
+        #Which variants exist is read once, instead of checked on every request
+        for hashed in self.manifest.values():
+            self.variants[hashed] = self.probe(os.path.join(self.build_dir, hashed))
+
+        app.url_defaults(self.hashed_url)
+        app.view_functions['static'] = self.send_static
+
+    def hashed_url(self, endpoint, values):
+        if endpoint == 'static' and values.get('filename') in self.manifest:
+            values['filename'] = self.manifest[values['filename']]
+
+    def probe(self, path):
+        return [(encoding, suffix) for encoding, suffix in ENCODINGS if os.path.isfile(path + suffix)]
+
+    def built_file_variants(self, filename):
+        #Files of earlier builds are no longer in the manifest, but pages
+        #rendered before the deploy still link to them. Found ones are
+        #remembered like the current build's; the manifest, variants and
+        #partial writes are not served
+        if filename == MANIFEST or filename.endswith(('.tmp',) + tuple(suffix for _, suffix in ENCODINGS)):
+            return None
+        path = safe_join(self.build_dir, filename)
+        if path is None or not os.path.isfile(path):
+            return None
+        variants = self.variants[filename] = self.probe(path)
+        return variants
+
+    def send_static(self, filename):
+        variants = self.variants.get(filename)
+        if variants is None:
+            variants = self.built_file_variants(filename)
+        if variants is None:
+            return current_app.send_static_file(filename)
+
+        encoding, suffix = None, ''
+        accepted = request.accept_encodings
+        for name, variant_suffix in variants:
+            if accepted[name]:
+                encoding, suffix = name, variant_suffix
+                break
+
+        response = send_from_directory(self.build_dir, filename + suffix, max_age=self.max_age,
+                                       mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if variants:
+            response.vary.add('Accept-Encoding')
+        return response
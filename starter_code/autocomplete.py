@@ -0,0 +1,211 @@
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from models import db, Venue, Artist
+from routing import RoutingSession
+
+#----------------------------------------------------------------------------#
+# Prefix index.
+#----------------------------------------------------------------------------#
+
+WORD = re.compile(r'\w+')
+
+def normalize(text):
+  #"Café  Zinc & Co." -> "cafe zinc co": accents and punctuation dropped,
+  #case folded and words single-spaced
+  text = text or ''
+  if not text.isascii():
+      decomposed = unicodedata.normalize('NFKD', text)
+      text = ''.join(c for c in decomposed if not unicodedata.combining(c))
+  return ' '.join(WORD.findall(text.casefold()))
+
+def suffixes(key):
+  #"park square live" -> "square live", "live": a query can start at any word
+  starts = [match.start() for match in re.finditer(r' ', key)]
+  return [key[start + 1:] for start in starts]
+
+
+class PrefixIndex:
+    '''Names kept as two sorted arrays of (key, id): normalized full names,
+    and the same names starting from each later word. A lookup is a binary
+    search plus a scan over the matches, so it costs about the same however
+    many names there are.
+    '''
+
+    def __init__(self, rows=()):
+        self._lock = threading.Lock()
+        self.load(rows)
+
+    def load(self, rows):
+        #Replace the contents with (id, name) rows; built before the swap so
+        #lookups meanwhile see the old index
+        names = {row_id: name for row_id, name in rows}
+        keys, later = [], []
+        for row_id, name in names.items():
+            key = normalize(name)
+            keys.append((key, row_id))
+            later.extend((suffix, row_id) for suffix in suffixes(key))
+        keys.sort()
+        later.sort()
+
+        with self._lock:
+            self.names, self.keys, self.later = names, keys, later
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, row_id, name):
+        with self._lock:
+            self._remove(row_id)
+            key = normalize(name)
+            self.names[row_id] = name
+            insort(self.keys, (key, row_id))
+            for suffix in suffixes(key):
+                insort(self.later, (suffix, row_id))
+
+    def remove(self, row_id):
+        with self._lock:
+            self._remove(row_id)
+
+    def _remove(self, row_id):
+        name = self.names.pop(row_id, None)
+        if name is None:
+            return
+        key = normalize(name)
+        for entries, entry_key in [(self.keys, key)] + [(self.later, suffix) for suffix in suffixes(key)]:
+            i = bisect_left(entries, (entry_key, row_id))
+            if i < len(entries) and entries[i] == (entry_key, row_id):
+                del entries[i]
+
+    def search(self, prefix, limit=10):
+        '''Up to `limit` (id, name) pairs whose name, or a later word of it,
+        starts with `prefix`; names that start with it come first.'''
+        prefix = normalize(prefix)
+        if not prefix or limit <= 0:
+            return []
+
+        results = []
+        seen = set()
+        with self._lock:
+            for entries in (self.keys, self.later):
+                i = bisect_left(entries, (prefix,))
+                while i < len(entries) and len(results) < limit:
+                    key, row_id = entries[i]
+                    if not key.startswith(prefix):
+                        break
+                    if row_id not in seen:
+                        seen.add(row_id)
+                        results.append((row_id, self.names[row_id]))
+                    i += 1
+        return results
+
+#----------------------------------------------------------------------------#
+# Extension.
+#----------------------------------------------------------------------------#
+
+KINDS = {'venues': Venue, 'artists': Artist}
+
+
+class Autocomplete:
+    '''Name suggestions for venues and artists from in-process prefix indexes.
+
+    Each index is loaded from the database on first use (or up front by
+    `warm`, which gunicorn runs in the master before forking). Names this
+    process creates, renames or deletes are applied once the session
+    commits. Changes made elsewhere (other workers, imports) are picked up
+    by reloading when the table's version has changed, checked at most
+    every AUTOCOMPLETE_REFRESH_SECONDS.
+    '''
+
+    def __init__(self, app=None):
+        self.indexes = {}
+        self.versions = {}
+        self.checked = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['autocomplete'] = self
+        self.refresh_seconds = app.config['AUTOCOMPLETE_REFRESH_SECONDS']
+
+    def warm(self):
+        for kind in KINDS:
+            self.index(kind)
+
+    def index(self, kind):
+        index = self.indexes.get(kind)
+        if index is not None and time.monotonic() - self.checked[kind] < self.refresh_seconds:
+            return index
+
+        from queries import table_version
+        #One thread loads or reloads at a time; the others keep using the old index
+        with self._lock:
+            index = self.indexes.get(kind)
+            if index is not None and time.monotonic() - self.checked[kind] < self.refresh_seconds:
+                return index
+
+            #Threads arriving during a reload take the fast path above
+            self.checked[kind] = time.monotonic()
+            model = KINDS[kind]
+            version = table_version(model)
+            if index is None or version != self.versions[kind]:
+                rows = db.session.query(model.id, model.name).all()
+                if index is None:
+                    index = self.indexes[kind] = PrefixIndex(rows)
+                else:
+                    index.load(rows)
+                self.versions[kind] = version
+            return index
+
+    def search(self, kind, prefix, limit):
+        return self.index(kind).search(prefix, limit)
+
+    def apply(self, changes):
+        #changes: (kind, id, name or None for a deletion) in commit order
+        for kind, row_id, name in changes:
+            index = self.indexes.get(kind)
+            if index is None:
+                continue
+            if name is None:
+                index.remove(row_id)
+            else:
+                index.add(row_id, name)
+
+#----------------------------------------------------------------------------#
+# Keeping the indexes current.
+#----------------------------------------------------------------------------#
+
+CHANGES_KEY = 'autocomplete_changes'
+
+KIND_OF = {model: kind for kind, model in KINDS.items()}
+
+def note_saved_name(mapper, connection, target):
+  history = db.inspect(target).attrs.name.history
+  if history.added:
+      _session_changes(target).append((KIND_OF[mapper.class_], target.id, target.name))
+
+def note_deleted_name(mapper, connection, target):
+  _session_changes(target).append((KIND_OF[mapper.class_], target.id, None))
+
+def _session_changes(target):
+  return db.inspect(target).session.info.setdefault(CHANGES_KEY, [])
+
+for model in KINDS.values():
+    event.listen(model, 'after_insert', note_saved_name)
+    event.listen(model, 'after_update', note_saved_name)
+    event.listen(model, 'after_delete', note_deleted_name)
+
+@event.listens_for(RoutingSession, 'after_commit')
+def apply_names(db_session):
+  changes = db_session.info.pop(CHANGES_KEY, None)
+  if changes and has_app_context() and 'autocomplete' in current_app.extensions:
+      current_app.extensions['autocomplete'].apply(changes)
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def discard_names(db_session):
+  db_session.info.pop(CHANGES_KEY, None)
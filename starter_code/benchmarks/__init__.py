@@ -0,0 +1 @@
+"""Benchmarks for Fyyur. Run each module from starter_code with `python -m benchmarks.<name>`."""
@@ -0,0 +1,57 @@
+"""Lookup, build and update cost of the autocomplete prefix index.
+
+Builds a PrefixIndex over --names synthetic multi-word names and times top-k
+lookups for short and longer prefixes, plus incremental adds and removes.
+No database is needed.
+
+    python -m benchmarks.autocomplete --names 60000
+"""
+import argparse
+import random
+import string
+import timeit
+
+from autocomplete import PrefixIndex
+
+
+def make_names(rng, count):
+    words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(count // 4 or 1)]
+    return [(i, ' '.join(rng.choice(words).title() for _ in range(rng.randint(1, 4)))) for i in range(1, count + 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--names', type=int, default=60000)
+    parser.add_argument('--queries', type=int, default=10000)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = make_names(rng, args.names)
+
+    best = min(timeit.repeat(lambda: PrefixIndex(rows), number=1, repeat=args.repeat))
+    print(f'{"build":>10}: {best * 1000:8.1f} ms for {len(rows)} names')
+
+    index = PrefixIndex(rows)
+    for length in (1, 2, 4):
+        prefixes = [rng.choice(rows)[1][:length] for _ in range(args.queries)]
+        best = min(timeit.repeat(lambda: [index.search(prefix, args.limit) for prefix in prefixes],
+                                 number=1, repeat=args.repeat))
+        print(f'{f"prefix {length}":>10}: {best / len(prefixes) * 1e6:8.2f} us/lookup  (top {args.limit})')
+
+    new_rows = [(args.names + i, name) for i, (_, name) in enumerate(make_names(rng, 1000), 1)]
+
+    def add_and_remove():
+        for row_id, name in new_rows:
+            index.add(row_id, name)
+        for row_id, _ in new_rows:
+            index.remove(row_id)
+
+    best = min(timeit.repeat(add_and_remove, number=1, repeat=args.repeat))
+    print(f'{"update":>10}: {best / (2 * len(new_rows)) * 1e6:8.2f} us per add or remove')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""Compare two benchmarks.run JSON result files route by route.
+
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import json
+
+METRICS = ['p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request', 'throughput_rps']
+
+
+def change(before, after):
+    if before in (None, 0) or after is None:
+        return '     -'
+    return f'{(after - before) / before * 100:+6.1f}%'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('before')
+    parser.add_argument('after')
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f'{before.get("commit")} -> {after.get("commit")}')
+    print(f'{"route":>18}  ' + '  '.join(f'{metric:>26}' for metric in METRICS))
+    for name, result in after['routes'].items():
+        old = before['routes'].get(name)
+        if old is None:
+            continue
+        cells = [f'{old[metric]!s:>9} -> {result[metric]!s:>9} {change(old[metric], result[metric])}' for metric in METRICS]
+        print(f'{name:>18}  ' + '  '.join(cells))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Bytes on the wire and compression CPU cost per route, per encoding and level.
+
+Each GET route from benchmarks/run.py is fetched --samples times uncompressed,
+then every body is compressed with gzip and brotli at several levels to
+measure the size and the CPU time per response. The "served" rows fetch the
+same pages through the app's compression with the configured levels, which
+includes the periodic flushes of streamed pages.
+
+    python -m benchmarks.compression --database-url postgresql://localhost/fyyur_bench
+    python -m benchmarks.compression --database-url ... --routes shows_all,venues --output compression.json
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+
+from benchmarks.run import routes, sample_ids, git_commit
+from compression import GzipEncoder, BrotliEncoder, brotli_available
+
+LEVELS = {
+    'gzip': (GzipEncoder, [1, 6, 9]),
+    'br': (BrotliEncoder, [1, 4, 6, 11])
+}
+
+
+def fetch(client, make_request, samples, accept_encoding):
+    bodies = []
+    for i in range(samples):
+        method, path, data = make_request(i)
+        response = client.open(path, method=method, data=data, headers={'Accept-Encoding': accept_encoding})
+        bodies.append(response.get_data())
+        response.close()
+    return bodies
+
+
+def measure(bodies, encoder_class, level, repeat):
+    #Smallest CPU time of `repeat` passes over all bodies, per body
+    size = 0
+    best = None
+    for _ in range(repeat):
+        started = time.process_time()
+        size = 0
+        for body in bodies:
+            encoder = encoder_class(level)
+            size += len(encoder.compress(body) + encoder.finish())
+        elapsed = time.process_time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return size / len(bodies), best / len(bodies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help='database to render the pages from')
+    parser.add_argument('--routes', help='comma-separated subset of GET routes to run')
+    parser.add_argument('--samples', type=int, default=10, help='pages fetched per route')
+    parser.add_argument('--repeat', type=int, default=5, help='timing passes per level')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    overrides = {}
+    if args.database_url:
+        overrides['SQLALCHEMY_DATABASE_URI'] = args.database_url
+
+    import logging
+    from app import create_app
+    app = create_app(overrides)
+    app.logger.setLevel(logging.WARNING)
+    client = app.test_client()
+
+    table = routes(sample_ids(app), random.Random(args.seed), int(time.time()))
+    names = args.routes.split(',') if args.routes else [name for name in table if table[name](0)[0] == 'GET']
+    encodings = [encoding for encoding in LEVELS if encoding != 'br' or brotli_available()]
+
+    results = {}
+    for name in names:
+        bodies = fetch(client, table[name], args.samples, 'identity')
+        plain = sum(len(body) for body in bodies) / len(bodies)
+        result = results[name] = {'identity_bytes': round(plain), 'encodings': {}}
+        print(f'{name:>18}  identity {plain:10.0f} B')
+
+        for encoding in encodings:
+            encoder_class, levels = LEVELS[encoding]
+            for level in levels:
+                size, seconds = measure(bodies, encoder_class, level, args.repeat)
+                result['encodings'][f'{encoding}-{level}'] = {'bytes': round(size), 'cpu_ms': round(seconds * 1000, 3)}
+                print(f'{"":>18}  {encoding + "-" + str(level):>8} {size:10.0f} B  {plain / size:5.1f}x  {seconds * 1000:8.3f} ms cpu')
+
+            served = fetch(client, table[name], args.samples, encoding)
+            size = sum(len(body) for body in served) / len(served)
+            result['encodings'][f'{encoding}-served'] = {'bytes': round(size)}
+            print(f'{"":>18}  {encoding + " served":>8} {size:10.0f} B  {plain / size:5.1f}x')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'commit': git_commit(),
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'samples_per_route': args.samples,
+                'gzip_level': app.config['COMPRESS_GZIP_LEVEL'],
+                'brotli_level': app.config['COMPRESS_BROTLI_LEVEL'],
+                'routes': results
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Per-row cost of the `datetime` Jinja filter.
+
+Compares the original string round trip (strftime -> dateutil parse ->
+babel.dates.format_datetime) with the current filter, both cold (caches
+cleared before each call) and warm (repeated timestamps, as on /shows).
+
+    python -m benchmarks.datetime_filter --rows 10000
+"""
+import argparse
+import random
+import timeit
+from datetime import datetime, timedelta
+
+import babel.dates
+import dateutil.parser
+
+from filters import format_datetime, datetime_pattern
+
+
+def legacy_format_datetime(value, format='medium'):
+    date = dateutil.parser.parse(value)
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format, locale='en')
+
+
+def make_rows(count, distinct):
+    #Shows cluster on a limited set of start times, like a real calendar
+    base = datetime(2026, 1, 1, 20, 0)
+    times = [base + timedelta(hours=12 * i) for i in range(distinct)]
+    return [random.choice(times) for _ in range(count)]
+
+
+def run_legacy(rows):
+    for value in rows:
+        legacy_format_datetime(value.strftime("%m/%d/%Y, %H:%M"), 'full')
+
+
+def run_cold(rows):
+    for value in rows:
+        format_datetime.cache_clear()
+        datetime_pattern.cache_clear()
+        format_datetime(value, 'full')
+
+
+def run_warm(rows):
+    for value in rows:
+        format_datetime(value, 'full')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--distinct', type=int, default=500, help='distinct start times among the rows')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.distinct)
+
+    #Both implementations must render identical text
+    for value in rows[:100]:
+        assert legacy_format_datetime(value.strftime("%m/%d/%Y, %H:%M"), 'full') == format_datetime(value, 'full')
+
+    format_datetime.cache_clear()
+    for name, func in (('legacy', run_legacy), ('cold', run_cold), ('warm', run_warm)):
+        best = min(timeit.repeat(lambda: func(rows), number=1, repeat=args.repeat))
+        print(f'{name:>6}: {best / len(rows) * 1e6:8.2f} us/row  ({best * 1000:.1f} ms for {len(rows)} rows)')
+
+
+if __name__ == '__main__':
+    main()
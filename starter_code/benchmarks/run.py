@@ -0,0 +1,279 @@
+"""Drive every Fyyur route and report latency, queries per request and throughput.
+
+By default requests go through the Flask test client in this process, with
+SQL instrumentation switched on so every request's query count is exact.
+With --url they are sent over HTTP to a running server instead, using
+--concurrency threads, and query counts come from the Server-Timing header
+(queries issued while a page streams are not included there).
+
+    python -m benchmarks.run --database-url postgresql://localhost/fyyur_bench --output before.json
+    python -m benchmarks.run --url http://localhost:5000 --concurrency 8 --requests 500
+
+Results are printed as a table and optionally written as JSON, which
+benchmarks/compare.py diffs between runs.
+
+Every route is covered except /static (see benchmarks/compression.py for
+asset responses) and /internal/* (diagnostics, off outside debug). Routes
+that write add rows to the database; delete_venue only deletes venues this
+run creates for it beforehand.
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import subprocess
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+VENUE_FORM = {
+    'city': 'Bench City', 'state': 'CA', 'address': '1 Bench Street', 'phone': '555-000-0000',
+    'genres': ['Jazz', 'Blues'], 'seeking_talent': 'y', 'seeking_description': 'Benchmarking'
+}
+
+ARTIST_FORM = {
+    'city': 'Bench City', 'state': 'CA', 'phone': '555-000-0000',
+    'genres': ['Jazz'], 'seeking_venue': 'y', 'seeking_description': 'Benchmarking'
+}
+
+
+def routes(ids, rng, run_id):
+    #name -> function(i) returning (method, path, body): form data as a dict,
+    #or a JSON document as a string. Created names take a serial number so
+    #warm-up and measured requests never collide
+    serial = itertools.count()
+    venue = lambda: rng.choice(ids['venues'])
+    artist = lambda: rng.choice(ids['artists'])
+    term = lambda: str(rng.randint(0, 999))
+    when = lambda: datetime.now() + timedelta(days=rng.randint(1, 365), hours=rng.randint(0, 23))
+    start = lambda: when().strftime('%Y-%m-%d %H:%M:%S')
+    tour = lambda: [{'venue_id': venue(), 'artist_id': artist(), 'start_time': start()} for _ in range(10)]
+    window = lambda: (lambda at: f'start={at:%Y-%m-%dT%H:%M}&end={at + timedelta(hours=3):%Y-%m-%dT%H:%M}')(when())
+    #Filled in by main() once it knows delete_venue will run
+    disposable = iter(ids['disposable'])
+
+    return {
+        'index': lambda i: ('GET', '/', None),
+        'venues': lambda i: ('GET', '/venues', None),
+        'artists': lambda i: ('GET', '/artists', None),
+        'shows': lambda i: ('GET', '/shows', None),
+        'shows_all': lambda i: ('GET', '/shows?all=1&per_page=100', None),
+        'show_venue': lambda i: ('GET', f'/venues/{venue()}', None),
+        'show_artist': lambda i: ('GET', f'/artists/{artist()}', None),
+        'search_venues': lambda i: ('POST', '/venues/search', {'search_term': term()}),
+        'search_artists': lambda i: ('POST', '/artists/search', {'search_term': term()}),
+        'edit_venue_form': lambda i: ('GET', f'/venues/{venue()}/edit', None),
+        'edit_artist_form': lambda i: ('GET', f'/artists/{artist()}/edit', None),
+        'create_venue_form': lambda i: ('GET', '/venues/create', None),
+        'create_artist_form': lambda i: ('GET', '/artists/create', None),
+        'create_show_form': lambda i: ('GET', '/shows/create', None),
+        'create_show_batch_form': lambda i: ('GET', '/shows/create-batch', None),
+        'create_venue': lambda i: ('POST', '/venues/create', dict(VENUE_FORM, name=f'Bench Venue {run_id}-{next(serial)}')),
+        'create_artist': lambda i: ('POST', '/artists/create', dict(ARTIST_FORM, name=f'Bench Artist {run_id}-{next(serial)}')),
+        'edit_venue': lambda i: ('POST', f'/venues/{ids["venues"][0]}/edit', dict(VENUE_FORM, name=f'Bench Edited Venue {run_id}')),
+        'edit_artist': lambda i: ('POST', f'/artists/{ids["artists"][0]}/edit', dict(ARTIST_FORM, name=f'Bench Edited Artist {run_id}')),
+        'create_show': lambda i: ('POST', '/shows/create', {'venue_id': venue(), 'artist_id': artist(), 'start_time': start()}),
+        'create_show_batch': lambda i: ('POST', '/shows/create-batch',
+                                        {f'shows-{n}-{field}': value for n, row in enumerate(tour()) for field, value in row.items()}),
+        'delete_venue': lambda i: ('DELETE', f'/venues/{next(disposable, 0)}/delete', None),
+        'api_venues': lambda i: ('GET', '/api/v1/venues', None),
+        'api_venue': lambda i: ('GET', f'/api/v1/venues/{venue()}', None),
+        'api_venue_availability': lambda i: ('GET', f'/api/v1/venues/{venue()}/availability?{window()}', None),
+        'api_artists': lambda i: ('GET', '/api/v1/artists', None),
+        'api_artist': lambda i: ('GET', f'/api/v1/artists/{artist()}', None),
+        'api_artist_availability': lambda i: ('GET', f'/api/v1/artists/{artist()}/availability?{window()}', None),
+        'api_shows': lambda i: ('GET', '/api/v1/shows', None),
+        'api_create_shows': lambda i: ('POST', '/api/v1/shows', json.dumps({'shows': tour()})),
+        'api_search_venues': lambda i: ('GET', f'/api/v1/search/venues?q={term()}', None),
+        'api_search_artists': lambda i: ('GET', f'/api/v1/search/artists?q={term()}', None),
+        'api_autocomplete': lambda i: ('GET', f'/api/v1/autocomplete/{rng.choice(["venues", "artists"])}?q={term()[:2]}', None),
+        'api_genres': lambda i: ('GET', f'/api/v1/genres/{rng.choice(["venues", "artists"])}', None),
+        'api_export': lambda i: ('GET', '/api/v1/export/venues', None),
+    }
+
+
+def percentile(sorted_values, fraction):
+    #Nearest-rank percentile
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, queries, errors, wall_seconds):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+        'throughput_rps': round(len(latencies) / wall_seconds, 1)
+    }
+
+#----------------------------------------------------------------------------#
+# Drivers.
+#----------------------------------------------------------------------------#
+
+def run_in_process(app, make_request, count):
+    from instrumentation import query_stats_recorded
+
+    recorded = []
+    def on_recorded(sender, endpoint, stats):
+        recorded.append(stats.count)
+
+    client = app.test_client()
+    latencies, queries, errors = [], [], 0
+    query_stats_recorded.connect(on_recorded, app)
+    try:
+        wall_started = time.perf_counter()
+        for i in range(count):
+            method, path, data = make_request(i)
+            started = time.perf_counter()
+            response = client.open(path, method=method, data=data,
+                                   content_type='application/json' if isinstance(data, str) else None)
+            response.get_data()
+            response.close()
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code >= 400
+        wall = time.perf_counter() - wall_started
+    finally:
+        query_stats_recorded.disconnect(on_recorded, app)
+
+    queries = recorded[-count:]
+    return summarize(latencies, queries, errors, wall)
+
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+def run_over_http(base_url, make_request, count, concurrency):
+    def one(i):
+        method, path, data = make_request(i)
+        headers = {}
+        if isinstance(data, str):
+            body = data.encode()
+            headers['Content-Type'] = 'application/json'
+        else:
+            body = urllib.parse.urlencode(data, doseq=True).encode() if data else None
+        request = urllib.request.Request(base_url + path, data=body, headers=headers, method=method)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                status, timing = response.status, response.headers.get('Server-Timing', '')
+        except urllib.error.HTTPError as error:
+            status, timing = error.code, ''
+        match = SERVER_TIMING_QUERIES.search(timing)
+        return time.perf_counter() - started, int(match.group(1)) if match else None, status >= 400
+
+    wall_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(count)))
+    wall = time.perf_counter() - wall_started
+
+    return summarize(
+        [latency for latency, _, _ in results],
+        [count for _, count, _ in results if count is not None],
+        sum(error for _, _, error in results),
+        wall
+    )
+
+#----------------------------------------------------------------------------#
+# Main.
+#----------------------------------------------------------------------------#
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def sample_ids(app):
+    from models import db, Venue, Artist
+    with app.app_context():
+        return {
+            'venues': [row_id for (row_id,) in db.session.query(Venue.id).order_by(db.func.random()).limit(1000)],
+            'artists': [row_id for (row_id,) in db.session.query(Artist.id).order_by(db.func.random()).limit(1000)]
+        }
+
+
+def disposable_venues(app, run_id, count):
+    #Venues without shows for delete_venue to remove, one per request
+    from models import db, Venue
+    with app.app_context():
+        venues = [Venue(name=f'Bench Disposable Venue {run_id}-{n}', **dict(VENUE_FORM, seeking_talent=True))
+                  for n in range(count)]
+        db.session.add_all(venues)
+        db.session.commit()
+        return [venue.id for venue in venues]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help='database for the in-process driver (and to pick ids from)')
+    parser.add_argument('--url', help='base URL of a running server to drive over HTTP')
+    parser.add_argument('--requests', type=int, default=100, help='measured requests per route')
+    parser.add_argument('--warmup', type=int, default=5, help='unmeasured requests per route')
+    parser.add_argument('--concurrency', type=int, default=4, help='HTTP driver threads')
+    parser.add_argument('--routes', help='comma-separated subset of routes to run')
+    parser.add_argument('--read-only', action='store_true', help='skip routes that write')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    overrides = {'SQL_INSTRUMENTATION': True, 'SQL_REPEAT_THRESHOLD': 1 << 30}
+    if args.database_url:
+        overrides['SQLALCHEMY_DATABASE_URI'] = args.database_url
+
+    import logging
+    from app import create_app
+    app = create_app(overrides)
+    app.logger.setLevel(logging.WARNING)
+
+    rng = random.Random(args.seed)
+    run_id = int(time.time())
+    ids = sample_ids(app)
+    ids['disposable'] = []
+    table = routes(ids, rng, run_id)
+    names = args.routes.split(',') if args.routes else list(table)
+    if args.read_only:
+        names = [name for name in names if table[name](0)[0] == 'GET']
+    if 'delete_venue' in names:
+        ids['disposable'].extend(disposable_venues(app, run_id, args.warmup + args.requests))
+
+    results = {}
+    for name in names:
+        if args.url:
+            run = lambda count: run_over_http(args.url.rstrip('/'), table[name], count, args.concurrency)
+        else:
+            run = lambda count: run_in_process(app, table[name], count)
+        if args.warmup:
+            run(args.warmup)
+        results[name] = run(args.requests)
+
+        r = results[name]
+        print(f'{name:>23}  p50 {r["p50_ms"]:9.2f} ms  p95 {r["p95_ms"]:9.2f} ms  p99 {r["p99_ms"]:9.2f} ms  '
+              f'{r["queries_per_request"] if r["queries_per_request"] is not None else "-":>6} q/req  '
+              f'{r["throughput_rps"]:8.1f} req/s  {r["errors"]} errors')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'commit': git_commit(),
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'driver': 'http' if args.url else 'test-client',
+                'concurrency': args.concurrency if args.url else 1,
+                'requests_per_route': args.requests,
+                'routes': results
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""Seed a local Postgres database with synthetic venues, artists and shows.
+
+The target database must already be migrated (`flask db upgrade`) and is
+emptied first (TRUNCATE ... RESTART IDENTITY), so the URL must be given
+explicitly. Rows are generated deterministically from --seed and loaded with
+COPY in batches, then the show and genre counters are recomputed and the
+tables analyzed.
+
+    python -m benchmarks.seed --database-url postgresql://localhost/fyyur_bench \\
+        --venues 10000 --artists 50000 --shows 1000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+CITIES = ['City %d' % i for i in range(200)]
+
+
+def choices(field):
+    return [value for value, label in field.kwargs['choices']]
+
+
+def venues(rng, count, states, genres):
+    for i in range(count):
+        yield {
+            'name': f'Venue {i}',
+            'city': rng.choice(CITIES),
+            'state': rng.choice(states),
+            'address': f'{rng.randint(1, 9999)} Main Street',
+            'phone': f'555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}',
+            'genres': rng.sample(genres, rng.randint(1, 3)),
+            'image_link': None,
+            'facebook_link': None,
+            'website_link': None,
+            'seeking_talent': rng.random() < 0.3,
+            'seeking_description': None
+        }
+
+
+def artists(rng, count, states, genres):
+    for i in range(count):
+        yield {
+            'name': f'Artist {i}',
+            'city': rng.choice(CITIES),
+            'state': rng.choice(states),
+            'phone': f'555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}',
+            'genres': rng.sample(genres, rng.randint(1, 3)),
+            'image_link': None,
+            'facebook_link': None,
+            'website_link': None,
+            'seeking_venue': rng.random() < 0.3,
+            'seeking_description': None
+        }
+
+
+def shows(rng, count, venue_count, artist_count, past_days, future_days):
+    #Start times are spread from past_days ago to future_days ahead, on the hour.
+    #Every show lasts two hours and no venue or artist gets two overlapping
+    #shows, which the exclusion constraints on "Show" would reject
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    span = 24 * (past_days + future_days) + 2
+    #Start hours already taken, as venue_id * span + hour (artists negated)
+    booked = set()
+    made = 0
+    while made < count:
+        venue_id = rng.randint(1, venue_count)
+        artist_id = rng.randint(1, artist_count)
+        hour = rng.randint(-24 * past_days, 24 * future_days)
+        venue_key = venue_id * span + hour
+        artist_key = -(artist_id * span + hour)
+        if any(key + h in booked for key in (venue_key, artist_key) for h in (-1, 0, 1)):
+            continue
+        booked.update((venue_key, artist_key))
+        made += 1
+        start_time = now + timedelta(hours=hour)
+        yield {
+            'venue_id': venue_id,
+            'artist_id': artist_id,
+            'start_time': start_time,
+            'end_time': start_time + timedelta(hours=2)
+        }
+
+
+def load(connection, table, rows, batch_size):
+    from importer import copy_rows, insert_rows
+
+    columns = None
+    loaded = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return loaded
+        columns = columns or list(batch[0])
+        if not copy_rows(connection, table.name, columns, batch):
+            insert_rows(connection, table, columns, batch)
+        loaded += len(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', required=True, help='database to empty and seed')
+    parser.add_argument('--venues', type=int, default=10000)
+    parser.add_argument('--artists', type=int, default=50000)
+    parser.add_argument('--shows', type=int, default=1000000)
+    parser.add_argument('--past-days', type=int, default=730)
+    parser.add_argument('--future-days', type=int, default=365)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    from app import create_app
+    from forms import VenueForm
+    from models import db, Venue, Artist, Show, sweep_show_counters, recount_genres
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': args.database_url})
+    rng = random.Random(args.seed)
+    states = choices(VenueForm.state)
+    genres = choices(VenueForm.genres)
+
+    with app.app_context():
+        connection = db.session.connection()
+        connection.execute(db.text('TRUNCATE "Show", "Venue", "Artist", "GenreCount" RESTART IDENTITY CASCADE'))
+
+        for table, rows in (
+            (Venue.__table__, venues(rng, args.venues, states, genres)),
+            (Artist.__table__, artists(rng, args.artists, states, genres)),
+            (Show.__table__, shows(rng, args.shows, args.venues, args.artists, args.past_days, args.future_days)),
+        ):
+            started = time.perf_counter()
+            loaded = load(connection, table, rows, args.batch_size)
+            seconds = time.perf_counter() - started
+            print(f'{table.name}: {loaded} rows in {seconds:.1f}s ({loaded / max(seconds, 1e-9):.0f} rows/s)')
+
+        #sweep_show_counters commits the load along with the counters
+        sweep_show_counters()
+        recount_genres()
+
+    #ANALYZE cannot run inside the ORM's transaction
+    with app.app_context():
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.execute(db.text('ANALYZE "Venue", "Artist", "Show"'))
+    print('Show and genre counters recomputed and tables analyzed.')
+
+
+if __name__ == '__main__':
+    main()
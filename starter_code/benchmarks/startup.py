@@ -0,0 +1,60 @@
+"""Worker startup time: importing app, building it with create_app and serving
+the first requests.
+
+Each sample runs in a fresh interpreter so nothing is already imported. The
+first requests (home page, then the venue form) show what the deferred
+imports cost when they are finally needed; neither touches the database.
+
+    python -m benchmarks.startup --runs 20
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+SAMPLE = '''
+import json, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+client = app.test_client()
+client.get('/')
+home = time.perf_counter()
+client.get('/venues/create')
+form = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_page_ms': (home - created) * 1000,
+    'first_form_ms': (form - home) * 1000,
+    'ready_ms': (created - started) * 1000,
+    'modules': len(__import__('sys').modules),
+}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--output', help='write the medians as JSON to this file')
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(args.runs):
+        output = subprocess.check_output([sys.executable, '-c', SAMPLE], text=True)
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    medians = {key: round(statistics.median(sample[key] for sample in samples), 2) for key in samples[0]}
+    for key, value in medians.items():
+        print(f'{key:>14}  {value}')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'runs': args.runs, 'medians': medians}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
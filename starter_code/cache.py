@@ -0,0 +1,187 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+#----------------------------------------------------------------------------#
+# Backends.
+#----------------------------------------------------------------------------#
+
+# Returned by backends when a key is absent or expired, so None can be cached.
+MISSING = object()
+
+
+class LocalCache:
+    '''In-process LRU cache whose entries also expire after ttl seconds.'''
+
+    def __init__(self, max_entries=1024, ttl=300, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+
+            expires, value = entry
+            if expires <= self.clock():
+                del self._entries[key]
+                return MISSING
+
+            #Mark as most recently used
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            #Evict least recently used entries past the bound
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SharedCache:
+    '''Cache kept in a shared key/value store so every worker sees the same
+    entries and invalidations.
+
+    client needs the get/set(ex=)/delete subset of the redis-py API.
+    '''
+
+    def __init__(self, client, ttl=300, prefix='fyyur:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return MISSING
+        return pickle.loads(raw)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ex=self.ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+class DictClient:
+    '''Local stand-in for a shared store client, for development and tests.'''
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+
+            expires, value = entry
+            if expires is not None and expires <= self.clock():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name, value, ex=None):
+        with self._lock:
+            self._data[name] = (None if ex is None else self.clock() + ex, value)
+
+    def delete(self, *names):
+        with self._lock:
+            for name in names:
+                self._data.pop(name, None)
+
+    def scan_iter(self, match='*'):
+        prefix = match.rstrip('*')
+        with self._lock:
+            return [name for name in self._data if name.startswith(prefix)]
+
+#----------------------------------------------------------------------------#
+# Read-through cache.
+#----------------------------------------------------------------------------#
+
+class ReadThroughCache:
+    '''Loads missing entries on demand and counts hits, misses and invalidations.'''
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key, loader):
+        value = self.backend.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = loader()
+        self.backend.set(key, value)
+        return value
+
+    def invalidate(self, *keys):
+        for key in keys:
+            self.backend.delete(key)
+        self.invalidations += len(keys)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+
+def cache_from_config(config):
+    '''Build the detail page cache described by the DETAIL_CACHE_* settings.
+
+    Outside debug mode and tests, invalidations have to reach every worker:
+    'shared' then needs a real store, and 'local' entries are kept only for
+    DETAIL_CACHE_LOCAL_TTL seconds.
+    '''
+    ttl = config['DETAIL_CACHE_TTL']
+    development = config.get('DEBUG') or config.get('TESTING')
+
+    if config['DETAIL_CACHE_BACKEND'] == 'shared':
+        url = config.get('DETAIL_CACHE_URL')
+        if url:
+            #Only needed when a real shared store is configured
+            import redis
+            client = redis.Redis.from_url(url)
+        elif development:
+            client = DictClient()
+        else:
+            raise RuntimeError("DETAIL_CACHE_BACKEND='shared' needs DETAIL_CACHE_URL outside debug mode")
+        return ReadThroughCache(SharedCache(client, ttl=ttl))
+
+    if not development:
+        ttl = min(ttl, config['DETAIL_CACHE_LOCAL_TTL'])
+    return ReadThroughCache(LocalCache(max_entries=config['DETAIL_CACHE_MAX_ENTRIES'], ttl=ttl))
@@ -0,0 +1,159 @@
+import zlib
+from flask import request
+
+#----------------------------------------------------------------------------#
+# Encoders.
+#----------------------------------------------------------------------------#
+
+class GzipEncoder:
+    def __init__(self, level):
+        #wbits=31 writes a gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        #Ends a block so everything compressed so far can be decoded
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self, level):
+        import brotli
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def brotli_available():
+  try:
+      import brotli
+  except ImportError:
+      return False
+  return True
+
+#----------------------------------------------------------------------------#
+# Streams.
+#----------------------------------------------------------------------------#
+
+class CompressedStream:
+    '''Compresses a streamed body as it is sent, flushing whenever buffer_size
+    bytes have gone in so the client can render rows as they arrive.'''
+
+    def __init__(self, chunks, source, encoder, buffer_size):
+        self.chunks = chunks
+        self.source = source
+        self.encoder = encoder
+        self.buffer_size = buffer_size
+
+    def __iter__(self):
+        pending = 0
+        for chunk in self.chunks:
+            data = self.encoder.compress(chunk)
+            pending += len(chunk)
+            if pending >= self.buffer_size:
+                data += self.encoder.flush()
+                pending = 0
+            if data:
+                yield data
+        yield self.encoder.finish()
+
+    def close(self):
+        #Ends the wrapped generator, e.g. stream_with_context's app context
+        if hasattr(self.source, 'close'):
+            self.source.close()
+
+#----------------------------------------------------------------------------#
+# Extension.
+#----------------------------------------------------------------------------#
+
+class Compression:
+    '''Compresses responses with brotli or gzip, as Accept-Encoding allows.
+
+    Only COMPRESS_MIMETYPES are compressed, and only bodies of at least
+    COMPRESS_MIN_SIZE bytes; streamed pages are compressed as they are
+    sent (unless COMPRESS_STREAMS is off). Responses that already have a
+    Content-Encoding or are sent from a file (static assets, which are
+    precompressed by `flask fyyur build-assets`) are left alone.
+    '''
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['compression'] = self
+        if not app.config['COMPRESS_ENABLED']:
+            return
+
+        self.mimetypes = set(app.config['COMPRESS_MIMETYPES'])
+        self.min_size = app.config['COMPRESS_MIN_SIZE']
+        self.streams = app.config['COMPRESS_STREAMS']
+        self.stream_buffer = app.config['COMPRESS_STREAM_BUFFER']
+        self.encoders = {
+          'br': (BrotliEncoder, app.config['COMPRESS_BROTLI_LEVEL']),
+          'gzip': (GzipEncoder, app.config['COMPRESS_GZIP_LEVEL'])
+        }
+        #Brotli is preferred when the client takes both and it is installed
+        self.preference = [encoding for encoding in ('br', 'gzip')
+                           if encoding != 'br' or brotli_available()]
+
+        app.after_request(self.compress_response)
+
+    def choose(self):
+        accepted = request.accept_encodings
+        for encoding in self.preference:
+            if accepted[encoding]:
+                return encoding
+        return None
+
+    def compress_response(self, response):
+        if response.mimetype not in self.mimetypes or response.direct_passthrough:
+            return response
+        if 'Content-Encoding' in response.headers or 'no-transform' in response.headers.get('Cache-Control', ''):
+            return response
+
+        #Whether a body is compressed depends on the request from here on
+        response.vary.add('Accept-Encoding')
+        encoding = self.choose()
+        if encoding is None:
+            return response
+
+        #The compressed body differs byte for byte from the plain one, so its
+        #ETag can only be a weak match for it. It is weakened whenever an
+        #encoding is accepted, before the bodiless and small responses go out
+        #as they are, so a 304 or HEAD carries the same validator as the 200
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        if request.method == 'HEAD' or response.status_code < 200 or response.status_code in (204, 206, 304):
+            return response
+        encoder_class, level = self.encoders[encoding]
+
+        if response.is_streamed:
+            if not self.streams:
+                return response
+            source = response.response
+            response.response = CompressedStream(response.iter_encoded(), source, encoder_class(level), self.stream_buffer)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            encoder = encoder_class(level)
+            response.set_data(encoder.compress(data) + encoder.finish())
+
+        response.headers['Content-Encoding'] = encoding
+        return response
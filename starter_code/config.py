@@ -1,12 +1,119 @@
 import os
-SECRET_KEY = os.urandom(32)
+# Must be shared by every worker; in debug mode a random per-process key is
+# used when it is unset
+SECRET_KEY = os.environ.get('SECRET_KEY')
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
 
-# Enable debug mode.
-DEBUG = True
+# Enable debug mode. The production server (gunicorn.conf.py) turns it off.
+DEBUG = os.environ.get('FYYUR_DEBUG', '1') not in ('0', 'false', 'no')
 
 # Connect to the database
 
 # TODO IMPLEMENT DATABASE URL
-SQLALCHEMY_DATABASE_URI = 'postgresql://postgres@localhost:5432/db_fyyur'
+SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'postgresql://postgres@localhost:5432/db_fyyur')
+
+# Maximum number of rows returned by the venue and artist name search
+SEARCH_RESULT_LIMIT = 50
+
+# Page size for the /shows listing; per_page requests are capped at the maximum
+SHOWS_PER_PAGE = 30
+SHOWS_MAX_PER_PAGE = 200
+
+# Stream the venue, artist and show listings, reading rows in batches of LIST_PAGE_BUFFER
+STREAM_LIST_PAGES = True
+LIST_PAGE_BUFFER = 500
+
+# Cache for assembled venue and artist pages. 'shared' keeps it in the redis
+# store at DETAIL_CACHE_URL, so every gunicorn worker and the CLI commands
+# (import, sweep-shows) see the same entries and invalidations; a local
+# stand-in replaces the store only in debug mode or tests. 'local' keeps an
+# LRU in each process: a write only clears the worker that handled it and CLI
+# writes clear nothing, so outside debug mode and tests its entries last at
+# most DETAIL_CACHE_LOCAL_TTL seconds
+DETAIL_CACHE_BACKEND = os.environ.get('DETAIL_CACHE_BACKEND', 'local')
+DETAIL_CACHE_URL = os.environ.get('DETAIL_CACHE_URL')
+DETAIL_CACHE_TTL = 300
+DETAIL_CACHE_LOCAL_TTL = 5
+DETAIL_CACHE_MAX_ENTRIES = 1024
+
+# Expose /internal/* diagnostics endpoints; on by default only in debug. Set
+# FYYUR_INTERNAL_ENDPOINTS=1 to reach them in production (keep them behind the
+# proxy or firewall), or 0 to hide them while debugging
+INTERNAL_ENDPOINTS = os.environ.get('FYYUR_INTERNAL_ENDPOINTS', '1' if DEBUG else '0') not in ('0', 'false', 'no')
+
+# Minutes `flask fyyur sweep-shows` looks back for shows that became past;
+# keep it longer than the interval the sweep is scheduled at
+SHOW_COUNTER_SWEEP_WINDOW = 60
+
+# Rows fetched per server-side cursor round trip by the catalog export
+EXPORT_BATCH_SIZE = 1000
+
+# Name suggestions (/api/v1/autocomplete/<kind>) come from in-process indexes
+# that reload when another process has changed the table, checked at most
+# every AUTOCOMPLETE_REFRESH_SECONDS
+AUTOCOMPLETE_REFRESH_SECONDS = 30
+AUTOCOMPLETE_MAX_RESULTS = 20
+
+# Compress HTML, JSON and other text responses with brotli or gzip, as the
+# client accepts. Bodies under COMPRESS_MIN_SIZE bytes are sent as they are;
+# streamed pages are compressed as they go out, flushed to the client every
+# COMPRESS_STREAM_BUFFER bytes of page. Brotli levels run 0-11 and gzip 1-9;
+# higher levels trade CPU per response for fewer bytes (see
+# benchmarks/compression.py).
+COMPRESS_ENABLED = True
+COMPRESS_MIMETYPES = ['text/html', 'text/css', 'text/plain', 'text/csv', 'application/json',
+                      'application/javascript', 'application/x-ndjson']
+COMPRESS_MIN_SIZE = 500
+COMPRESS_GZIP_LEVEL = 6
+COMPRESS_BROTLI_LEVEL = 4
+COMPRESS_STREAMS = True
+COMPRESS_STREAM_BUFFER = 16 * 1024
+
+# Count queries per request (Server-Timing header and log line) and warn when a
+# request issues the same statement more than SQL_REPEAT_THRESHOLD times
+SQL_INSTRUMENTATION = False
+SQL_REPEAT_THRESHOLD = 5
+
+# Database connection pool, overridable per environment. Connections idle in the
+# pool longer than DB_POOL_RECYCLE seconds are replaced, and each checkout is
+# pinged first when DB_POOL_PRE_PING is on. DB_STATEMENT_TIMEOUT is in
+# milliseconds (0 disables it). Keys set in SQLALCHEMY_ENGINE_OPTIONS take
+# precedence over these.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') not in ('0', 'false', 'no')
+DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT', 30000))
+DB_APPLICATION_NAME = os.environ.get('DB_APPLICATION_NAME', 'fyyur')
+
+# Compiled templates are kept here between processes (and written ahead of time
+# by `flask fyyur precompile-templates`); set it empty to disable the cache.
+# Templates are only re-checked for changes on each render in debug mode.
+TEMPLATE_BYTECODE_CACHE_DIR = os.environ.get('TEMPLATE_BYTECODE_CACHE_DIR', os.path.join(basedir, '.jinja_cache'))
+TEMPLATES_AUTO_RELOAD = DEBUG
+
+# Content-hashed, precompressed copies of the static files, written by
+# `flask fyyur build-assets`. Once built (and outside debug mode)
+# url_for('static', ...) links to them and they are cached by browsers for
+# STATIC_MAX_AGE seconds; set the directory empty to serve static/ as is.
+STATIC_BUILD_DIR = os.environ.get('STATIC_BUILD_DIR', os.path.join(basedir, '.static_build'))
+STATIC_MAX_AGE = 365 * 24 * 60 * 60
+
+# Read replicas (comma-separated DATABASE_REPLICA_URLS). GET requests and
+# read-only form posts such as search read from them in turn, falling back to
+# the primary; a replica that can't be reached is skipped for
+# REPLICA_RETRY_SECONDS. For REPLICA_READ_YOUR_WRITES_SECONDS after a client's
+# request commits, that client reads from the primary so the page it is
+# redirected to shows its change despite replication lag.
+SQLALCHEMY_REPLICA_URIS = [uri for uri in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if uri]
+REPLICA_RETRY_SECONDS = 30
+REPLICA_READ_YOUR_WRITES_SECONDS = 10
+
+# Length in minutes given to shows booked without an end time
+SHOW_DEFAULT_DURATION = 120
+
+# Most shows accepted by one batch submission (/shows/create-batch and
+# POST /api/v1/shows)
+SHOW_BATCH_MAX_ROWS = 100
@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from flask import current_app
+from models import db, Venue, Artist, Show
+
+#----------------------------------------------------------------------------#
+# Export formats.
+#----------------------------------------------------------------------------#
+
+# Rows are written in id order so an interrupted export can be resumed by
+# passing the last id received as after_id. CSV genres are joined with ";"
+# and booleans written as true/false, which `flask fyyur import` reads back.
+MODELS = {
+  'venues': Venue,
+  'artists': Artist,
+  'shows': Show
+}
+
+FORMATS = {
+  'csv': 'text/csv',
+  'ndjson': 'application/x-ndjson'
+}
+
+def export_rows(kind, after_id=None):
+  #Read the table through a server-side cursor so memory stays flat
+  table = MODELS[kind].__table__
+  statement = db.select(table).order_by(table.c.id)
+  if after_id is not None:
+      statement = statement.where(table.c.id > after_id)
+
+  batch_size = current_app.config['EXPORT_BATCH_SIZE']
+  result = db.session.execute(statement.execution_options(yield_per=batch_size))
+  for partition in result.partitions():
+      yield [row._mapping for row in partition]
+
+def csv_value(value):
+  if isinstance(value, list):
+      return ';'.join(value)
+  if isinstance(value, bool):
+      return 'true' if value else 'false'
+  if isinstance(value, datetime):
+      return value.isoformat(sep=' ')
+  return value
+
+def encode_csv(kind, batches, header=True):
+  columns = [column.name for column in MODELS[kind].__table__.columns]
+  buffer = io.StringIO()
+  writer = csv.writer(buffer)
+  if header:
+      writer.writerow(columns)
+
+  for rows in batches:
+      for row in rows:
+          writer.writerow([csv_value(row[column]) for column in columns])
+      #Hand over one chunk per batch instead of one per row
+      yield buffer.getvalue().encode()
+      buffer.seek(0)
+      buffer.truncate()
+
+  if buffer.tell():
+      yield buffer.getvalue().encode()
+
+def encode_ndjson(kind, batches, header=True):
+  for rows in batches:
+      lines = [json.dumps(dict(row), default=lambda value: value.isoformat()) for row in rows]
+      yield ('\n'.join(lines) + '\n').encode()
+
+def gzip_chunks(chunks, level=6):
+  #Compress on the fly; wbits=31 writes a gzip header and trailer
+  compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+  for chunk in chunks:
+      data = compressor.compress(chunk)
+      if data:
+          yield data
+  yield compressor.flush()
+
+def export_stream(kind, file_format='csv', after_id=None, compress=False):
+  '''Yield the encoded bytes of a full (or resumed) export of one table.'''
+  encode = encode_csv if file_format == 'csv' else encode_ndjson
+  #A resumed CSV export is appended to the earlier file, so it skips the header
+  chunks = encode(kind, export_rows(kind, after_id), header=after_id is None)
+  if compress:
+      chunks = gzip_chunks(chunks)
+  return chunks
@@ -0,0 +1,35 @@
+from datetime import timezone
+from functools import lru_cache
+
+#----------------------------------------------------------------------------#
+# Filters.
+#----------------------------------------------------------------------------#
+
+# babel and dateutil are imported on first use rather than at startup, since
+# most requests a fresh worker serves never format a date
+
+DATETIME_FORMATS = {
+  'full': "EEEE MMMM, d, y 'at' h:mma",
+  'medium': "EE MM, dd, y h:mma"
+}
+
+@lru_cache(maxsize=None)
+def datetime_pattern(format, locale):
+  #Compile each babel pattern and load each locale once instead of on every call
+  import babel
+  import babel.dates
+  return babel.dates.parse_pattern(format), babel.Locale.parse(locale)
+
+@lru_cache(maxsize=4096)
+def format_datetime(value, format='medium', locale='en'):
+  #Accepts datetime objects directly; strings are still parsed for older callers.
+  #Results are memoized, so repeated timestamps on a page are formatted once
+  if isinstance(value, str):
+      import dateutil.parser
+      value = dateutil.parser.parse(value)
+  if value.tzinfo is None:
+      #babel treats naive datetimes as UTC
+      value = value.replace(tzinfo=timezone.utc)
+
+  pattern, locale = datetime_pattern(DATETIME_FORMATS.get(format, format), locale)
+  return pattern.apply(value, locale)
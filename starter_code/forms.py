@@ -1,7 +1,7 @@
 from datetime import datetime
 from flask_wtf import Form
-from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField
-from wtforms.validators import DataRequired, AnyOf, URL
+from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField, FieldList, FormField
+from wtforms.validators import DataRequired, AnyOf, URL, Optional, ValidationError
 
 class ShowForm(Form):
     artist_id = StringField(
@@ -15,6 +15,21 @@ class ShowForm(Form):
         validators=[DataRequired()],
         default= datetime.today()
     )
+    end_time = DateTimeField(
+        'end_time',
+        validators=[Optional()]
+    )
+
+    def validate_end_time(form, field):
+        if field.data and form.start_time.data and field.data <= form.start_time.data:
+            raise ValidationError('End time must be after the start time.')
+
+class ShowBatchForm(Form):
+    #Rows are submitted as shows-<n>-artist_id etc.; each is validated as a ShowForm
+    shows = FieldList(
+        FormField(ShowForm),
+        min_entries=10
+    )
 
 class VenueForm(Form):
     name = StringField(
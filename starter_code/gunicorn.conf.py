@@ -0,0 +1,71 @@
+#----------------------------------------------------------------------------#
+# Production server settings, read by `gunicorn -c gunicorn.conf.py` and by
+# `flask fyyur serve`. Every value can be overridden from the environment.
+#----------------------------------------------------------------------------#
+
+import multiprocessing
+import os
+
+# Production defaults for the app itself; the app is built in the master
+# process below, so these must be in place before it is loaded
+os.environ.setdefault('FYYUR_DEBUG', '0')
+
+wsgi_app = 'app:create_app()'
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+
+# Worker processes scale with the CPUs; each runs a few threads so requests
+# waiting on Postgres don't hold up the rest. Keep workers * threads within
+# DB_POOL_SIZE + DB_MAX_OVERFLOW per worker's pool.
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers now and then so slow leaks can't build up; the jitter keeps
+# them from all restarting at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+# Build the app and compile its templates once in the master, so workers
+# share that memory copy-on-write and start serving straight after fork.
+# SIGHUP re-reads this file and gracefully replaces the workers; with preload
+# they keep the code the master loaded, so a code deploy needs a new master
+# (SIGUSR2, then SIGQUIT to the old one) or GUNICORN_PRELOAD=0.
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') not in ('0', 'false', 'no')
+
+
+def when_ready(server):
+    if preload_app:
+        from app import compile_templates
+        app = server.app.wsgi()
+        count = compile_templates(app)
+        server.log.info('Compiled %d templates before forking workers', count)
+
+        #Workers inherit the loaded autocomplete indexes instead of each
+        #reading every venue and artist name on its first suggestion. Gunicorn
+        #exits if this hook raises, so an unreachable database at boot must
+        #only leave the indexes to be loaded on first use
+        try:
+            with app.app_context():
+                app.extensions['autocomplete'].warm()
+        except Exception as e:
+            server.log.warning('Could not load the autocomplete indexes before forking workers; '
+                               'they will load on first use (%s)', e)
+        else:
+            server.log.info('Loaded the autocomplete indexes before forking workers')
+
+
+def post_fork(server, worker):
+    #Connections opened in the master (e.g. by preload) must not be shared
+    #with the workers; drop them from each worker's copy of the pools
+    from models import db
+    app = worker.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,333 @@
+import csv
+import io
+import json
+import time
+from collections import namedtuple
+from itertools import islice
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from werkzeug.datastructures import MultiDict
+from forms import VenueForm, ArtistForm, ShowForm
+from models import db, Venue, Artist, Show, adjust_show_counters, adjust_genre_counts
+from queries import show_end_time, bookings
+
+#----------------------------------------------------------------------------#
+# Import formats.
+#----------------------------------------------------------------------------#
+
+# Columns loaded for each kind of record, in COPY order. Rows are validated by
+# the same form the web pages use, so e.g. start_time must be
+# "YYYY-MM-DD HH:MM:SS" and genres/state must be one of the form's choices.
+# In CSV files genres are separated by ";". Shows may name their artist and
+# venue (artist_name, venue_name) instead of giving artist_id/venue_id, and
+# without an end_time last SHOW_DEFAULT_DURATION minutes.
+KINDS = {
+  'venues': (Venue, VenueForm, ['name', 'city', 'state', 'address', 'phone', 'genres', 'image_link',
+                                'facebook_link', 'website_link', 'seeking_talent', 'seeking_description']),
+  'artists': (Artist, ArtistForm, ['name', 'city', 'state', 'phone', 'genres', 'image_link',
+                                   'facebook_link', 'website_link', 'seeking_venue', 'seeking_description']),
+  'shows': (Show, ShowForm, ['artist_id', 'venue_id', 'start_time', 'end_time'])
+}
+
+# Optional unique columns: empty values are stored as NULL so they don't collide
+NULLABLE_UNIQUE = ('image_link', 'facebook_link', 'website_link')
+
+ImportResult = namedtuple('ImportResult', ['loaded', 'errors', 'seconds', 'method'])
+
+def read_records(path, file_format=None):
+  #Yield (line number, record) pairs from a CSV or NDJSON file
+  file_format = file_format or ('csv' if path.endswith('.csv') else 'ndjson')
+  with open(path, newline='', encoding='utf-8') as f:
+      if file_format == 'csv':
+          reader = csv.DictReader(f)
+          for record in reader:
+              genres = record.get('genres')
+              if genres:
+                  record['genres'] = [genre.strip() for genre in genres.split(';') if genre.strip()]
+              yield reader.line_num, record
+      else:
+          for line_number, line in enumerate(f, 1):
+              if line.strip():
+                  yield line_number, json.loads(line)
+
+#----------------------------------------------------------------------------#
+# Validation.
+#----------------------------------------------------------------------------#
+
+def formdata(record):
+  #Shape a record like a submitted form: lists become repeated keys and
+  #false booleans are left out, as an unticked checkbox would be
+  data = MultiDict()
+  for key, value in record.items():
+      if value is None or value is False:
+          continue
+      if isinstance(value, list):
+          for item in value:
+              data.add(key, item)
+      else:
+          data.add(key, str(value))
+  return data
+
+# Record fields that may hold a list; every other value must be a single one
+LIST_FIELDS = ('genres',)
+
+def scalar_errors(record):
+  #Lists or objects where one value belongs (e.g. "artist_id": [1]) can't be
+  #looked up or validated, so the row is rejected up front
+  return {key: ['Must be a single value.'] for key, value in record.items()
+          if isinstance(value, (list, dict)) and key not in LIST_FIELDS}
+
+def resolve_show_references(records):
+  #Replace artist_name/venue_name with ids using one query per table
+  for name_key, id_key, model in (('artist_name', 'artist_id', Artist), ('venue_name', 'venue_id', Venue)):
+      names = {record[name_key] for _, record in records if record.get(name_key) and not record.get(id_key)}
+      if not names:
+          continue
+
+      ids = dict(db.session.query(model.name, model.id).filter(model.name.in_(names)).all())
+      for _, record in records:
+          name = record.get(name_key)
+          if name and not record.get(id_key) and name in ids:
+              record[id_key] = ids[name]
+
+def validate_batch(kind, records, seen_names):
+  #Return the rows that pass the form's validators, plus (line, error) pairs
+  model, form_class, columns = KINDS[kind]
+  rows = []
+  errors = []
+
+  checked = []
+  for line_number, record in records:
+      record_errors = scalar_errors(record)
+      if record_errors:
+          errors.append((line_number, record_errors))
+      else:
+          checked.append((line_number, record))
+  records = checked
+
+  if kind == 'shows':
+      resolve_show_references(records)
+      ids = {
+        'artist_id': {record.get('artist_id') for _, record in records},
+        'venue_id': {record.get('venue_id') for _, record in records}
+      }
+      #Every referenced artist and venue is looked up in one round trip
+      known = {'artist_id': set(), 'venue_id': set()}
+      lookup = db.union_all(
+        db.select(db.literal('artist_id'), Artist.id).where(Artist.id.in_(_ints(ids['artist_id']))),
+        db.select(db.literal('venue_id'), Venue.id).where(Venue.id.in_(_ints(ids['venue_id'])))
+      )
+      for key, row_id in db.session.execute(lookup):
+          known[key].add(row_id)
+  else:
+      names = {record.get('name') for _, record in records}
+      existing = {name for (name,) in db.session.query(model.name).filter(model.name.in_(names))}
+
+  for line_number, record in records:
+      form = form_class(formdata(record), meta={"csrf": False})
+      if not form.validate():
+          errors.append((line_number, form.errors))
+          continue
+
+      if kind == 'shows':
+          missing = [key for key in ('artist_id', 'venue_id') if _int(form[key].data) not in known[key]]
+          if missing:
+              errors.append((line_number, {key: ['Unknown id or name.'] for key in missing}))
+              continue
+      else:
+          if form.name.data in existing or form.name.data in seen_names:
+              errors.append((line_number, {'name': ['Already exists.']}))
+              continue
+          seen_names.add(form.name.data)
+
+      row = {}
+      for column in columns:
+          value = form[column].data
+          if column in NULLABLE_UNIQUE and not value:
+              value = None
+          if column in ('artist_id', 'venue_id'):
+              value = _int(value)
+          if column == 'end_time':
+              value = show_end_time(row['start_time'], value)
+          row[column] = value
+      rows.append(row)
+
+  return rows, errors
+
+def _int(value):
+  try:
+      return int(value)
+  except (TypeError, ValueError):
+      return None
+
+def _ints(values):
+  return [value for value in map(_int, values) if value is not None]
+
+#----------------------------------------------------------------------------#
+# Loading.
+#----------------------------------------------------------------------------#
+
+def copy_rows(connection, table, columns, rows):
+  #Stream rows through COPY FROM STDIN; returns False when the driver can't
+  cursor = connection.connection.dbapi_connection.cursor()
+  quoted = ', '.join(f'"{column}"' for column in columns)
+
+  if hasattr(cursor, 'copy'):
+      #psycopg 3 adapts lists to Postgres arrays itself
+      with cursor.copy(f'COPY "{table}" ({quoted}) FROM STDIN') as copy:
+          for row in rows:
+              copy.write_row([row[column] for column in columns])
+      return True
+
+  if hasattr(cursor, 'copy_expert'):
+      #psycopg2 reads CSV from a file object, so arrays and booleans are
+      #written as Postgres literals
+      buffer = io.StringIO()
+      writer = csv.writer(buffer)
+      for row in rows:
+          writer.writerow([_copy_literal(row[column]) for column in columns])
+      buffer.seek(0)
+      cursor.copy_expert(f'COPY "{table}" ({quoted}) FROM STDIN WITH (FORMAT csv)', buffer)
+      return True
+
+  return False
+
+def _copy_literal(value):
+  if value is None:
+      return None
+  if isinstance(value, bool):
+      return 't' if value else 'f'
+  if isinstance(value, list):
+      return '{' + ','.join('"' + str(item).replace('\\', '\\\\').replace('"', '\\"') + '"' for item in value) + '}'
+  return value
+
+def insert_rows(connection, table, columns, rows):
+  connection.execute(db.insert(table), rows)
+
+def import_file(kind, path, file_format=None, batch_size=1000, use_copy=True):
+  '''Validate and load a CSV or NDJSON file of venues, artists or shows in one transaction.'''
+  model, form_class, columns = KINDS[kind]
+  table = model.__table__
+  started = time.perf_counter()
+  loaded = 0
+  errors = []
+  seen_names = set()
+  stale_pages = set()
+  method = 'copy' if use_copy else 'insert'
+
+  connection = db.session.connection()
+  records = read_records(path, file_format)
+  try:
+      while True:
+          batch = list(islice(records, batch_size))
+          if not batch:
+              break
+
+          rows, batch_errors = validate_batch(kind, batch, seen_names)
+          if kind == 'shows':
+              #Double bookings are reported per line instead of aborting the load
+              #at the exclusion constraint. Earlier batches are already loaded in
+              #this transaction, so the check sees them along with existing shows
+              keyed_rows = list(zip(valid_keys(batch, batch_errors), rows))
+              conflicts = booking_conflicts(keyed_rows)
+              conflicting = {line_number for line_number, _ in conflicts}
+              rows = [row for line_number, row in keyed_rows if line_number not in conflicting]
+              batch_errors = sorted(batch_errors + conflicts, key=lambda error: error[0])
+          errors.extend(batch_errors)
+          if not rows:
+              continue
+
+          if method == 'copy' and not copy_rows(connection, table.name, columns, rows):
+              method = 'insert'
+          if method == 'insert':
+              insert_rows(connection, table, columns, rows)
+
+          #COPY and multi-row INSERT bypass the ORM events that keep the counters
+          if kind == 'shows':
+              adjust_show_counters(connection, [(row['venue_id'], row['artist_id'], row['start_time']) for row in rows])
+              for row in rows:
+                  stale_pages.update((f"venue:{row['venue_id']}", f"artist:{row['artist_id']}"))
+          else:
+              adjust_genre_counts(connection, kind, added=[row['genres'] for row in rows])
+
+          loaded += len(rows)
+
+      db.session.commit()
+  except Exception:
+      db.session.rollback()
+      raise
+
+  current_app.extensions['detail_cache'].invalidate(*stale_pages)
+
+  return ImportResult(loaded, errors, time.perf_counter() - started, method)
+
+#----------------------------------------------------------------------------#
+# Show batches.
+#----------------------------------------------------------------------------#
+
+ShowBatchResult = namedtuple('ShowBatchResult', ['ids', 'errors'])
+
+def valid_keys(records, errors):
+  #Keys of the records validate_batch turned into rows, in the same order
+  failed = {key for key, _ in errors}
+  return [key for key, _ in records if key not in failed]
+
+def booking_conflicts(keyed_rows):
+  #(key, error) pairs for rows overlapping an existing show or an earlier row
+  #of the batch at the same venue or with the same artist
+  if not keyed_rows:
+      return []
+
+  rows = [row for _, row in keyed_rows]
+  booked = bookings({row['venue_id'] for row in rows}, {row['artist_id'] for row in rows},
+                    min(row['start_time'] for row in rows), max(row['end_time'] for row in rows))
+
+  errors = []
+  accepted = []
+  for key, row in keyed_rows:
+      clashes = [label for label, column in (('venue', 'venue_id'), ('artist', 'artist_id'))
+                 if any(show[column] == row[column] and show['start_time'] < row['end_time']
+                        and row['start_time'] < show['end_time'] for show in booked + accepted)]
+      if clashes:
+          errors.append((key, {'start_time': [f'The {label} is already booked at that time.' for label in clashes]}))
+      else:
+          accepted.append(row)
+  return errors
+
+def create_show_batch(records):
+  '''Validate (key, record) pairs of shows and insert them all in one transaction, or none.
+
+  Records are validated like import rows; the result holds the new show ids in
+  record order, or the (key, errors) pairs that kept the batch from being saved.
+  '''
+  rows, errors = validate_batch('shows', records, set())
+  keyed_rows = list(zip(valid_keys(records, errors), rows))
+  errors.extend(booking_conflicts(keyed_rows))
+  if errors or not rows:
+      db.session.rollback()
+      position = {key: i for i, (key, _) in enumerate(records)}
+      return ShowBatchResult([], sorted(errors, key=lambda error: position[error[0]]))
+
+  #One multi-row INSERT; it bypasses the ORM events that keep the counters
+  table = Show.__table__
+  connection = db.session.connection()
+  try:
+      ids = connection.execute(db.insert(table).values(rows).returning(table.c.id)).scalars().all()
+      adjust_show_counters(connection, [(row['venue_id'], row['artist_id'], row['start_time']) for row in rows])
+      db.session.commit()
+  except IntegrityError as e:
+      #23P01: a concurrent booking took one of the slots after the check above
+      db.session.rollback()
+      if '23P01' not in (getattr(e.orig, 'sqlstate', None), getattr(e.orig, 'pgcode', None)):
+          raise
+      return ShowBatchResult([], [(None, {'start_time': ['A venue or artist was booked at one of these times meanwhile.']})])
+  except Exception:
+      db.session.rollback()
+      raise
+
+  stale_pages = set()
+  for row in rows:
+      stale_pages.update((f"venue:{row['venue_id']}", f"artist:{row['artist_id']}"))
+  current_app.extensions['detail_cache'].invalidate(*stale_pages)
+
+  return ShowBatchResult(ids, [])
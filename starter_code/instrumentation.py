@@ -0,0 +1,126 @@
+import re
+import time
+from collections import Counter
+from blinker import Namespace
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+#----------------------------------------------------------------------------#
+# Statement fingerprints.
+#----------------------------------------------------------------------------#
+
+_PATTERNS = [
+  (re.compile(r'::\w+(?:\[\])?'), ''),                              # type casts
+  (re.compile(r"'(?:[^']|'')*'"), '?'),                             # string literals
+  (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),                          # numbers
+  (re.compile(r'%\(\w+\)s|\$\d+|:\w+'), '?'),                       # bound parameters
+  (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?)'),               # IN lists of any length
+  (re.compile(r'\s+'), ' '),
+]
+
+def fingerprint(statement):
+  #Reduce a statement to its shape so the same query with different
+  #parameters counts as a repeat
+  for pattern, replacement in _PATTERNS:
+      statement = pattern.sub(replacement, statement)
+  return statement.strip()
+
+#----------------------------------------------------------------------------#
+# Per-request statistics.
+#----------------------------------------------------------------------------#
+
+STATS_KEY = 'fyyur.query_stats'
+
+signals = Namespace()
+
+# Sent with (app, endpoint=..., stats=...) when a response has been fully sent,
+# including any rows rendered while streaming
+query_stats_recorded = signals.signal('query-stats-recorded')
+
+class QueryStats:
+    '''Queries issued while handling one request.'''
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.statements[fingerprint(statement)] += 1
+
+    def repeated(self, threshold):
+        return [(statement, count) for statement, count in self.statements.most_common() if count > threshold]
+
+
+class SQLInstrumentation:
+    '''Counts queries per request, reports them in a Server-Timing header and
+    a log line, and flags endpoints that repeat a statement (N+1 loops).
+
+    Enabled by SQL_INSTRUMENTATION; SQL_REPEAT_THRESHOLD is the number of
+    identical statements a request may issue before it is flagged.
+    '''
+
+    def __init__(self, app=None):
+        #endpoint -> {fingerprint: highest repeat count seen}
+        self.flagged = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['sql_instrumentation'] = self
+        if not app.config['SQL_INSTRUMENTATION']:
+            return
+
+        self.app = app
+        self.threshold = app.config['SQL_REPEAT_THRESHOLD']
+
+        #Listening on the Engine class covers every engine the app creates
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_error)
+
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+
+    def start_request(self):
+        #Kept on the WSGI environ rather than g: stream_with_context renders
+        #streamed pages under a fresh app context, but the same request
+        request.environ[STATS_KEY] = QueryStats()
+
+    def finish_request(self, response):
+        stats = request.environ[STATS_KEY]
+        endpoint = request.endpoint
+        response.headers['Server-Timing'] = f'db;dur={stats.seconds * 1000:.2f};desc="{stats.count} queries"'
+
+        #Streamed pages keep querying after this point, so the final tally is
+        #taken once the response has been sent
+        response.call_on_close(lambda: self.report(endpoint, stats))
+        return response
+
+    def report(self, endpoint, stats):
+        self.app.logger.info('%s: %d queries in %.2f ms', endpoint, stats.count, stats.seconds * 1000)
+
+        for statement, count in stats.repeated(self.threshold):
+            seen = self.flagged.setdefault(endpoint, {})
+            seen[statement] = max(count, seen.get(statement, 0))
+            self.app.logger.warning('%s issued the same statement %d times: %s', endpoint, count, statement)
+
+        query_stats_recorded.send(self.app, endpoint=endpoint, stats=stats)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  started = conn.info['query_started'].pop()
+  if has_request_context() and STATS_KEY in request.environ:
+      request.environ[STATS_KEY].record(statement, time.perf_counter() - started)
+
+def _handle_error(context):
+  #A failed statement never reaches after_cursor_execute
+  if context.connection is not None and context.connection.info.get('query_started'):
+      context.connection.info['query_started'].pop()
@@ -0,0 +1,29 @@
+from flask import Blueprint, abort, current_app, jsonify
+from models import db
+from pool import pool_stats
+
+internal = Blueprint('internal', __name__, url_prefix='/internal')
+
+@internal.before_request
+def require_internal_endpoints():
+  if not current_app.config['INTERNAL_ENDPOINTS']:
+      abort(404)
+
+@internal.route('/cache')
+def cache_stats():
+  return jsonify(current_app.extensions['detail_cache'].stats())
+
+@internal.route('/queries')
+def query_stats():
+  #Endpoints that repeated a statement more than SQL_REPEAT_THRESHOLD times
+  return jsonify(current_app.extensions['sql_instrumentation'].flagged)
+
+@internal.route('/pool')
+def connection_pool_stats():
+  #Live connection pool usage and cumulative checkout wait time
+  return jsonify(pool_stats(db.engine))
+
+@internal.route('/replicas')
+def replica_health():
+  #Health of each configured read replica, as seen by this worker
+  return jsonify(current_app.extensions['replica_routing'].status())
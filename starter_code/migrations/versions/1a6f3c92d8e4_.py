@@ -0,0 +1,26 @@
+"""add row versions
+
+Revision ID: 1a6f3c92d8e4
+Revises: e9d27f3a1c58
+Create Date: 2026-10-18 19:12:40.218773
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1a6f3c92d8e4'
+down_revision = 'e9d27f3a1c58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist', 'Show'):
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    for table in ('Show', 'Artist', 'Venue'):
+        op.drop_column(table, 'version')
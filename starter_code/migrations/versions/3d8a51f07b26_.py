@@ -0,0 +1,53 @@
+"""add genre indexes and genre counts
+
+Revision ID: 3d8a51f07b26
+Revises: 1a6f3c92d8e4
+Create Date: 2026-10-18 19:42:16.208817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d8a51f07b26'
+down_revision = '1a6f3c92d8e4'
+branch_labels = None
+depends_on = None
+
+# GIN indexes serve the genre filters' array containment (@>) and overlap (&&)
+# operators; built concurrently so venues and artists stay writable.
+INDEXES = [
+    ('ix_Venue_genres', 'Venue'),
+    ('ix_Artist_genres', 'Artist'),
+]
+
+
+def upgrade():
+    op.create_table('GenreCount',
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('genre', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'genre')
+    )
+
+    # Backfill from the existing rows; writes keep the counts current after this
+    for table, kind in (('Venue', 'venues'), ('Artist', 'artists')):
+        op.execute(f'''
+            INSERT INTO "GenreCount" (kind, genre, count)
+            SELECT '{kind}', genre, count(DISTINCT id)
+            FROM "{table}", unnest(genres) AS genre
+            GROUP BY genre
+        ''')
+
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.create_index(name, table, ['genres'], unique=False, postgresql_using='gin', postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+    op.drop_table('GenreCount')
@@ -0,0 +1,28 @@
+"""add show start_time keyset index
+
+Revision ID: 4f7b19c0d6e2
+Revises: 8c41d2e7a9b3
+Create Date: 2026-10-18 17:20:45.902117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f7b19c0d6e2'
+down_revision = '8c41d2e7a9b3'
+branch_labels = None
+depends_on = None
+
+
+# Built concurrently (outside a transaction) so Show stays writable meanwhile
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('ix_Show_start_time_id', 'Show', ['start_time', 'id'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_Show_start_time_id', table_name='Show', postgresql_concurrently=True)
@@ -0,0 +1,34 @@
+"""add trigram indexes for name search
+
+Revision ID: 8c41d2e7a9b3
+Revises: dff062315fc9
+Create Date: 2026-10-18 17:02:11.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c41d2e7a9b3'
+down_revision = 'dff062315fc9'
+branch_labels = None
+depends_on = None
+
+
+# The extension is created in the migration's transaction; the GIN indexes are
+# then built concurrently in an autocommit block so Venue and Artist stay
+# writable while they build.
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        op.create_index('ix_Venue_name_trgm', 'Venue', ['name'], unique=False, postgresql_concurrently=True,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+        op.create_index('ix_Artist_name_trgm', 'Artist', ['name'], unique=False, postgresql_concurrently=True,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_Artist_name_trgm', table_name='Artist', postgresql_concurrently=True)
+        op.drop_index('ix_Venue_name_trgm', table_name='Venue', postgresql_concurrently=True)
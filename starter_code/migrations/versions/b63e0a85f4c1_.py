@@ -0,0 +1,38 @@
+"""add indexes for show and venue lookups
+
+Revision ID: b63e0a85f4c1
+Revises: 4f7b19c0d6e2
+Create Date: 2026-10-18 18:05:37.540291
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b63e0a85f4c1'
+down_revision = '4f7b19c0d6e2'
+branch_labels = None
+depends_on = None
+
+# CREATE INDEX CONCURRENTLY cannot run inside a transaction, so each statement
+# runs in an autocommit block and the tables stay writable while indexes build.
+# A standalone start_time index is not needed: ix_Show_start_time_id already
+# leads with start_time.
+INDEXES = [
+    ('ix_Show_venue_id_start_time', 'Show', ['venue_id', 'start_time']),
+    ('ix_Show_artist_id_start_time', 'Show', ['artist_id', 'start_time']),
+    ('ix_Venue_state_city', 'Venue', ['state', 'city']),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,60 @@
+"""add show end times and double-booking exclusion constraints
+
+Revision ID: c72e4b19a0d5
+Revises: 3d8a51f07b26
+Create Date: 2026-10-18 20:27:53.613094
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c72e4b19a0d5'
+down_revision = '3d8a51f07b26'
+branch_labels = None
+depends_on = None
+
+# Existing shows get the default length (SHOW_DEFAULT_DURATION in config.py).
+# Adding an exclusion constraint builds its GiST index under an exclusive lock
+# and fails if bookings already overlap, so overlaps are reported first. Only
+# shows the constraint covers are compared: tsrange(NULL, NULL) is unbounded
+# and would overlap everything.
+DEFAULT_DURATION = "interval '120 minutes'"
+
+OVERLAPS = '''
+    SELECT a.id, b.id FROM "Show" a JOIN "Show" b
+      ON a.{column} = b.{column} AND a.id < b.id
+     AND a.start_time IS NOT NULL AND a.end_time IS NOT NULL
+     AND b.start_time IS NOT NULL AND b.end_time IS NOT NULL
+     AND tsrange(a.start_time, a.end_time) && tsrange(b.start_time, b.end_time)
+    LIMIT 20
+'''
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    op.add_column('Show', sa.Column('end_time', sa.DateTime(), nullable=True))
+    op.execute(f'UPDATE "Show" SET end_time = start_time + {DEFAULT_DURATION} WHERE start_time IS NOT NULL')
+    op.create_check_constraint('ck_Show_end_after_start', 'Show', 'end_time > start_time')
+
+    connection = op.get_bind()
+    for column in ('venue_id', 'artist_id'):
+        overlapping = connection.execute(sa.text(OVERLAPS.format(column=column))).fetchall()
+        if overlapping:
+            pairs = ', '.join(f'{a}/{b}' for a, b in overlapping)
+            raise RuntimeError(f'Shows with the same {column} overlap and must be moved or given an '
+                               f'end_time before upgrading (show id pairs: {pairs})')
+
+        op.execute(f'''
+            ALTER TABLE "Show" ADD CONSTRAINT "ex_Show_{column}_time"
+            EXCLUDE USING gist ({column} WITH =, tsrange(start_time, end_time) WITH &&)
+            WHERE (start_time IS NOT NULL AND end_time IS NOT NULL)
+        ''')
+
+
+def downgrade():
+    op.drop_constraint('ex_Show_artist_id_time', 'Show')
+    op.drop_constraint('ex_Show_venue_id_time', 'Show')
+    op.drop_constraint('ck_Show_end_after_start', 'Show')
+    op.drop_column('Show', 'end_time')
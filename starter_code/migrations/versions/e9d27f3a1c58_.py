@@ -0,0 +1,36 @@
+"""add show counters to venue and artist
+
+Revision ID: e9d27f3a1c58
+Revises: b63e0a85f4c1
+Create Date: 2026-10-18 18:31:09.774802
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9d27f3a1c58'
+down_revision = 'b63e0a85f4c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist'):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the existing shows; `flask fyyur sweep-shows` keeps them current
+    for table, column in (('Venue', 'venue_id'), ('Artist', 'artist_id')):
+        op.execute(f'''
+            UPDATE "{table}" SET
+              upcoming_shows_count = (SELECT count(*) FROM "Show" WHERE "Show".{column} = "{table}".id AND "Show".start_time > now()),
+              past_shows_count = (SELECT count(*) FROM "Show" WHERE "Show".{column} = "{table}".id AND "Show".start_time <= now())
+        ''')
+
+
+def downgrade():
+    for table in ('Artist', 'Venue'):
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
@@ -0,0 +1,225 @@
+from collections import Counter
+from datetime import datetime
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+from routing import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+#----------------------------------------------------------------------------#
+# Models.
+#----------------------------------------------------------------------------#
+
+class Venue(db.Model):
+    __tablename__ = 'Venue'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(), unique=True, nullable=False)
+    city = db.Column(db.String(120), nullable=False)
+    state = db.Column(db.String(120), nullable=False)
+    address = db.Column(db.String(120), nullable=False)
+    phone = db.Column(db.String(120), nullable=False)
+    genres = db.Column(postgresql.ARRAY(db.String()))
+    image_link = db.Column(db.String(), unique=True)
+    facebook_link = db.Column(db.String(), unique=True)
+    website_link = db.Column(db.String(), unique=True)
+    seeking_talent = db.Column(db.Boolean, default=False)
+    seeking_description = db.Column(db.String())
+    shows = db.relationship('Show', backref='venue', lazy=True)
+
+    #Maintained on Show insert/delete and rolled forward by `flask fyyur sweep-shows`
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    #Bumped by every UPDATE of the row, including counter updates; feeds the API ETags
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1', onupdate=db.literal_column('version + 1'))
+
+    __table_args__ = (
+        db.Index('ix_Venue_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_Venue_state_city', 'state', 'city'),
+        db.Index('ix_Venue_genres', 'genres', postgresql_using='gin'),
+    )
+
+    # TODO: implement any missing fields, as a database migration using Flask-Migrate
+
+class Artist(db.Model):
+    __tablename__ = 'Artist'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(), unique=True, nullable=False)
+    city = db.Column(db.String(120), nullable=False)
+    state = db.Column(db.String(120), nullable=False)
+    phone = db.Column(db.String(120), nullable=False)
+    genres = db.Column(postgresql.ARRAY(db.String()))
+    image_link = db.Column(db.String(), unique=True)
+    facebook_link = db.Column(db.String(), unique=True)
+    website_link = db.Column(db.String(), unique=True)
+    seeking_venue = db.Column(db.Boolean, default=False)
+    seeking_description = db.Column(db.String())
+    shows = db.relationship('Show', backref='artist', lazy=True)
+
+    #Maintained on Show insert/delete and rolled forward by `flask fyyur sweep-shows`
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    #Bumped by every UPDATE of the row, including counter updates; feeds the API ETags
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1', onupdate=db.literal_column('version + 1'))
+
+    __table_args__ = (
+        db.Index('ix_Artist_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_Artist_genres', 'genres', postgresql_using='gin'),
+    )
+
+    # TODO: implement any missing fields, as a database migration using Flask-Migrate
+
+
+# TODO Implement Show and Artist models, and complete all model relationships and properties, as a database migration.
+
+class Show(db.Model):
+    __tablename__ = 'Show'
+
+    id = db.Column(db.Integer, primary_key=True)
+    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id'), nullable=False)
+    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), nullable=False)
+    start_time = db.Column(db.DateTime())
+    end_time = db.Column(db.DateTime())
+
+    #Bumped by every UPDATE of the row; feeds the API ETags
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1', onupdate=db.literal_column('version + 1'))
+
+    #A venue or artist can't have two shows whose [start_time, end_time) ranges
+    #overlap. The constraints' GiST indexes (btree_gist for the id equality) also
+    #serve the availability checks. Times are naive, hence tsrange; shows
+    #without times (a NULL bound would make the range unbounded) are left out.
+    __table_args__ = (
+        db.Index('ix_Show_start_time_id', 'start_time', 'id'),
+        db.Index('ix_Show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_Show_artist_id_start_time', 'artist_id', 'start_time'),
+        db.CheckConstraint('end_time > start_time', name='ck_Show_end_after_start'),
+        postgresql.ExcludeConstraint(
+            (venue_id, '='), (db.func.tsrange(start_time, end_time), '&&'),
+            name='ex_Show_venue_id_time', using='gist', where='start_time IS NOT NULL AND end_time IS NOT NULL'
+        ),
+        postgresql.ExcludeConstraint(
+            (artist_id, '='), (db.func.tsrange(start_time, end_time), '&&'),
+            name='ex_Show_artist_id_time', using='gist', where='start_time IS NOT NULL AND end_time IS NOT NULL'
+        ),
+    )
+
+class GenreCount(db.Model):
+    '''Number of venues or artists listing each genre, for the genre facets.'''
+    __tablename__ = 'GenreCount'
+
+    kind = db.Column(db.String(20), primary_key=True)
+    genre = db.Column(db.String(), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+#----------------------------------------------------------------------------#
+# Show counters.
+#----------------------------------------------------------------------------#
+
+def adjust_show_counters(connection, shows, sign=1):
+  #Add (sign=1) or remove (sign=-1) shows given as (venue_id, artist_id, start_time)
+  #from the denormalized counters, with one UPDATE per affected venue and artist
+  now = datetime.now()
+  deltas = {Venue: Counter(), Artist: Counter()}
+  for venue_id, artist_id, start_time in shows:
+      column = 'upcoming_shows_count' if start_time is not None and start_time > now else 'past_shows_count'
+      deltas[Venue][(int(venue_id), column)] += sign
+      deltas[Artist][(int(artist_id), column)] += sign
+
+  for model, counter in deltas.items():
+      for (row_id, column), delta in counter.items():
+          if delta:
+              connection.execute(
+                db.update(model.__table__)
+                  .where(model.__table__.c.id == row_id)
+                  .values({column: model.__table__.c[column] + delta})
+              )
+
+@event.listens_for(Show, 'after_insert')
+def count_inserted_show(mapper, connection, target):
+  adjust_show_counters(connection, [(target.venue_id, target.artist_id, target.start_time)], 1)
+
+@event.listens_for(Show, 'after_delete')
+def count_deleted_show(mapper, connection, target):
+  adjust_show_counters(connection, [(target.venue_id, target.artist_id, target.start_time)], -1)
+
+def sweep_show_counters(since=None):
+  #Recount venues and artists with shows that started after `since`, moving them
+  #from upcoming to past; with since=None every row is recounted
+  now = datetime.now()
+  for model, show_column in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+      upcoming = db.select(db.func.count(Show.id)) \
+        .where(show_column == model.id, Show.start_time > now) \
+        .scalar_subquery()
+      past = db.select(db.func.count(Show.id)) \
+        .where(show_column == model.id, Show.start_time <= now) \
+        .scalar_subquery()
+
+      statement = db.update(model).values(upcoming_shows_count=upcoming, past_shows_count=past)
+      if since is not None:
+          started = db.select(show_column).where(Show.start_time > since, Show.start_time <= now)
+          statement = statement.where(model.id.in_(started))
+
+      db.session.execute(statement.execution_options(synchronize_session=False))
+
+  db.session.commit()
+
+#----------------------------------------------------------------------------#
+# Genre counts.
+#----------------------------------------------------------------------------#
+
+GENRE_KINDS = {Venue: 'venues', Artist: 'artists'}
+
+def adjust_genre_counts(connection, kind, added=(), removed=()):
+  #Count the genre lists in `added` in and those in `removed` out, with a single
+  #upsert covering every genre whose count changes
+  deltas = Counter()
+  for genres in added:
+      deltas.update(set(genres or ()))
+  for genres in removed:
+      deltas.subtract(set(genres or ()))
+
+  rows = [{'kind': kind, 'genre': genre, 'count': delta} for genre, delta in deltas.items() if delta]
+  if not rows:
+      return
+
+  table = GenreCount.__table__
+  statement = postgresql.insert(table).values(rows)
+  connection.execute(statement.on_conflict_do_update(
+    index_elements=[table.c.kind, table.c.genre],
+    set_={'count': table.c.count + statement.excluded['count']}
+  ))
+
+def count_inserted_genres(mapper, connection, target):
+  adjust_genre_counts(connection, GENRE_KINDS[mapper.class_], added=[target.genres])
+
+def count_updated_genres(mapper, connection, target):
+  history = db.inspect(target).attrs.genres.history
+  if history.added or history.deleted:
+      adjust_genre_counts(connection, GENRE_KINDS[mapper.class_], added=history.added, removed=history.deleted)
+
+def count_deleted_genres(mapper, connection, target):
+  adjust_genre_counts(connection, GENRE_KINDS[mapper.class_], removed=[target.genres])
+
+for model in GENRE_KINDS:
+    event.listen(model, 'after_insert', count_inserted_genres)
+    event.listen(model, 'after_update', count_updated_genres)
+    event.listen(model, 'after_delete', count_deleted_genres)
+
+def recount_genres():
+  #Rebuild every genre count from the venue and artist rows
+  table = GenreCount.__table__
+  db.session.execute(db.delete(table))
+  for model, kind in GENRE_KINDS.items():
+      genre = db.func.unnest(model.genres).table_valued('genre').render_derived()
+      db.session.execute(db.insert(table).from_select(
+        ['kind', 'genre', 'count'],
+        db.select(db.literal(kind), genre.c.genre, db.func.count(db.distinct(model.id)))
+          .select_from(model.__table__.join(genre, db.true()))
+          .group_by(genre.c.genre)
+      ))
+
+  db.session.commit()
@@ -0,0 +1,89 @@
+import threading
+import time
+from sqlalchemy.pool import QueuePool
+
+#----------------------------------------------------------------------------#
+# Connection pool.
+#----------------------------------------------------------------------------#
+
+class TimedQueuePool(QueuePool):
+    '''QueuePool that records how long checkouts wait for a free connection.
+
+    Wait time covers queueing behind other requests and opening new
+    connections; checkouts that give up after pool_timeout are counted too.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._wait_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._wait_lock:
+                self.checkouts += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def recreate(self):
+        #dispose() replaces the pool; carry the totals over so they survive it
+        pool = super().recreate()
+        pool.checkouts = self.checkouts
+        pool.timeouts = self.timeouts
+        pool.wait_seconds = self.wait_seconds
+        pool.max_wait_seconds = self.max_wait_seconds
+        return pool
+
+    def stats(self):
+        return {
+            'size': self.size(),
+            'checked_in': self.checkedin(),
+            'checked_out': self.checkedout(),
+            'overflow': max(self.overflow(), 0),
+            'max_overflow': self._max_overflow,
+            'checkouts': self.checkouts,
+            'timeouts': self.timeouts,
+            'wait_ms_total': round(self.wait_seconds * 1000, 3),
+            'wait_ms_mean': round(self.wait_seconds * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+            'wait_ms_max': round(self.max_wait_seconds * 1000, 3)
+        }
+
+
+def engine_options(config):
+    '''SQLALCHEMY_ENGINE_OPTIONS built from the DB_POOL_* and DB_* settings.'''
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING']
+    }
+
+    #libpq parameters, understood by both psycopg2 and psycopg 3
+    connect_args = {'application_name': config['DB_APPLICATION_NAME']}
+    if config['DB_STATEMENT_TIMEOUT']:
+        connect_args['options'] = f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT']}"
+    options['connect_args'] = connect_args
+
+    #Anything set explicitly in SQLALCHEMY_ENGINE_OPTIONS wins
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    return options
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    if isinstance(pool, TimedQueuePool):
+        return pool.stats()
+    return {'status': pool.status()}
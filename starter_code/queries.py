@@ -0,0 +1,401 @@
+import hashlib
+from datetime import datetime, timedelta
+from itertools import groupby
+from flask import abort, current_app
+from sqlalchemy.orm import contains_eager
+from models import db, Venue, Artist, Show, GenreCount
+
+#----------------------------------------------------------------------------#
+# Queries.
+#----------------------------------------------------------------------------#
+
+def genre_filters(args):
+  #?genre=Jazz&genre=Blues matches rows listing all of the genres, or any of
+  #them with ?genre_match=any
+  match = args.get('genre_match', 'all')
+  if match not in ('all', 'any'):
+      abort(400, description='genre_match must be "all" or "any".')
+  return {"genres": [genre for genre in args.getlist('genre') if genre], "match": match}
+
+def filter_genres(query, model, genres=None, match='all'):
+  #Array containment (@>) and overlap (&&) are both served by the GIN index
+  if not genres:
+      return query
+  if match == 'any':
+      return query.filter(model.genres.overlap(genres))
+  return query.filter(model.genres.contains(genres))
+
+def venue_areas(genres=None, match='all'):
+  rows = db.session.query(
+      Venue.id,
+      Venue.name,
+      Venue.city,
+      Venue.state,
+      Venue.upcoming_shows_count.label('num_upcoming_shows')
+    )
+  rows = filter_genres(rows, Venue, genres, match) \
+    .order_by(Venue.state, Venue.city, Venue.id) \
+    .yield_per(current_app.config['LIST_PAGE_BUFFER'])
+
+  #Rows arrive sorted by area from a server-side cursor, so each city record is
+  #built in a single pass and handed to the template before the next one is read
+  for (city, state), area_rows in groupby(rows, key=lambda row: (row.city, row.state)):
+      venues = []
+      for row in area_rows:
+          venues.append({
+            "id": row.id,
+            "name": row.name,
+            "num_upcoming_shows": row.num_upcoming_shows
+          })
+
+      yield {
+        "city": city,
+        "state": state,
+        "venues": venues
+      }
+
+def artist_list(genres=None, match='all'):
+  rows = filter_genres(db.session.query(Artist.id, Artist.name), Artist, genres, match) \
+    .order_by(Artist.id) \
+    .yield_per(current_app.config['LIST_PAGE_BUFFER'])
+
+  for row in rows:
+      yield {
+        "id": row.id,
+        "name": row.name
+      }
+
+def search_by_name(model, search_term, genres=None, match='all'):
+  #Escape LIKE wildcards so the term is matched literally by the trigram index
+  escaped = search_term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+  #Matches, total match count and upcoming show counts come back from one query;
+  #the window count is evaluated before LIMIT so it still reports every match
+  rows = db.session.query(
+      model.id,
+      model.name,
+      model.upcoming_shows_count.label('num_upcoming_shows'),
+      db.func.count().over().label('total')
+    ).filter(model.name.ilike(f'%{escaped}%'))
+  rows = filter_genres(rows, model, genres, match) \
+    .order_by(db.func.similarity(model.name, search_term).desc(), model.name) \
+    .limit(current_app.config['SEARCH_RESULT_LIMIT']) \
+    .all()
+
+  data = []
+  for row in rows:
+      data.append({
+        "id": row.id,
+        "name": row.name,
+        "num_upcoming_shows": row.num_upcoming_shows
+      })
+
+  return {
+    "count": rows[0].total if rows else 0,
+    "data": data
+  }
+
+def datetime_arg(args, name):
+  #Parse an ISO 8601 query string argument, rejecting malformed values
+  value = args.get(name)
+  if not value:
+      return None
+  try:
+      value = datetime.fromisoformat(value)
+  except ValueError:
+      abort(400)
+  #Show times are stored as naive local times
+  if value.tzinfo is not None:
+      value = value.astimezone().replace(tzinfo=None)
+  return value
+
+def show_filters(args):
+  #Translate /shows query string arguments into shows_page() arguments.
+  #Only upcoming shows are listed unless a start date is given or all=1 is passed
+  start = datetime_arg(args, 'from')
+  if start is None and not args.get('all'):
+      start = datetime.now()
+
+  after = None
+  after_time = datetime_arg(args, 'after')
+  after_id = args.get('after_id', type=int)
+  if after_time is not None and after_id is not None:
+      after = (after_time, after_id)
+
+  per_page = args.get('per_page', current_app.config['SHOWS_PER_PAGE'], type=int)
+  per_page = max(1, min(per_page, current_app.config['SHOWS_MAX_PER_PAGE']))
+
+  return {
+    "per_page": per_page,
+    "start": start,
+    "end": datetime_arg(args, 'to'),
+    "venue_id": args.get('venue_id', type=int),
+    "artist_id": args.get('artist_id', type=int),
+    "after": after
+  }
+
+def shows_page(per_page, page, start=None, end=None, venue_id=None, artist_id=None, after=None):
+  #Select only the columns the listing needs instead of hydrating Show, Venue and Artist.
+  #Shows without a start time can't be placed in the listing or carry a cursor
+  query = db.session.query(
+      Show.id,
+      Show.start_time,
+      Show.venue_id,
+      Venue.name.label('venue_name'),
+      Show.artist_id,
+      Artist.name.label('artist_name'),
+      Artist.image_link.label('artist_image_link')
+    ).join(Venue, Show.venue_id == Venue.id) \
+    .join(Artist, Show.artist_id == Artist.id) \
+    .filter(Show.start_time.isnot(None))
+
+  if start is not None:
+      query = query.filter(Show.start_time >= start)
+  if end is not None:
+      query = query.filter(Show.start_time < end)
+  if venue_id is not None:
+      query = query.filter(Show.venue_id == venue_id)
+  if artist_id is not None:
+      query = query.filter(Show.artist_id == artist_id)
+
+  #Keyset pagination: continue after the (start_time, id) of the previous page's last row,
+  #which is a bounded range scan on ix_Show_start_time_id however deep the page is
+  if after is not None:
+      query = query.filter(db.tuple_(Show.start_time, Show.id) > after)
+
+  #Fetch one extra row to find out whether there is a next page; the key of the
+  #last row shown is left in page['after'] once the rows have been consumed
+  rows = query.order_by(Show.start_time, Show.id) \
+    .limit(per_page + 1) \
+    .yield_per(min(per_page + 1, current_app.config['LIST_PAGE_BUFFER']))
+
+  last = None
+  for count, row in enumerate(rows):
+      if count == per_page:
+          page['after'] = (last.start_time, last.id)
+          break
+
+      last = row
+      yield {
+        "venue_id": row.venue_id,
+        "venue_name": row.venue_name,
+        "artist_id": row.artist_id,
+        "artist_name": row.artist_name,
+        "artist_image_link": row.artist_image_link,
+        "start_time": row.start_time
+      }
+
+def show_end_time(start_time, end_time=None):
+  #Shows booked without an end time last SHOW_DEFAULT_DURATION minutes
+  if end_time is not None or start_time is None:
+      return end_time
+  return start_time + timedelta(minutes=current_app.config['SHOW_DEFAULT_DURATION'])
+
+def booked_shows(column, row_id, start, end):
+  #Shows of one venue (column=Show.venue_id) or artist overlapping [start, end).
+  #This matches the exclusion constraint's expression and predicate, so it is
+  #answered by a probe of that GiST index however many shows there are
+  rows = db.session.query(Show.id, Show.venue_id, Show.artist_id, Show.start_time, Show.end_time) \
+    .filter(
+      column == row_id,
+      Show.start_time.isnot(None),
+      Show.end_time.isnot(None),
+      db.func.tsrange(Show.start_time, Show.end_time).op('&&')(db.func.tsrange(start, end))
+    ).order_by(Show.start_time) \
+    .all()
+
+  return [{
+    "id": row.id,
+    "venue_id": row.venue_id,
+    "artist_id": row.artist_id,
+    "start_time": row.start_time,
+    "end_time": row.end_time
+  } for row in rows]
+
+def bookings(venue_ids, artist_ids, start, end):
+  #Shows of any of these venues or artists overlapping [start, end), for
+  #checking a batch of new shows against the calendar in one query
+  rows = db.session.query(Show.id, Show.venue_id, Show.artist_id, Show.start_time, Show.end_time) \
+    .filter(
+      db.or_(Show.venue_id.in_(venue_ids), Show.artist_id.in_(artist_ids)),
+      Show.start_time.isnot(None),
+      Show.end_time.isnot(None),
+      db.func.tsrange(Show.start_time, Show.end_time).op('&&')(db.func.tsrange(start, end))
+    ).all()
+
+  return [{
+    "id": row.id,
+    "venue_id": row.venue_id,
+    "artist_id": row.artist_id,
+    "start_time": row.start_time,
+    "end_time": row.end_time
+  } for row in rows]
+
+def venue_page(venue_id):
+  #Load the venue with all of its shows and their artists in one query. Shows
+  #without a start time are neither past nor upcoming, so they are left out
+  selected_venue = Venue.query \
+    .outerjoin(Show, db.and_(Show.venue_id == Venue.id, Show.start_time.isnot(None))) \
+    .outerjoin(Show.artist) \
+    .options(contains_eager(Venue.shows).contains_eager(Show.artist)) \
+    .filter(Venue.id == venue_id) \
+    .order_by(Show.start_time) \
+    .one_or_none()
+
+  if selected_venue is None:
+      abort(404)
+
+  #Lists to store records of past and future shows to build output
+  past_shows_records = []
+  future_shows_records = []
+
+  #Split the shows around a single timestamp so every show lands in exactly one list
+  now = datetime.now()
+  for each_show in selected_venue.shows:
+      record = {
+        "artist_id": each_show.artist_id,
+        "artist_name": each_show.artist.name,
+        "artist_image_link": each_show.artist.image_link,
+        "start_time": each_show.start_time
+      }
+      if each_show.start_time < now:
+          past_shows_records.append(record)
+      else:
+          future_shows_records.append(record)
+
+  data = {
+        "id": selected_venue.id,
+        "name": selected_venue.name,
+        "genres": selected_venue.genres,
+        "address": selected_venue.address,
+        "city": selected_venue.city,
+        "state": selected_venue.state,
+        "phone": selected_venue.phone,
+        "website": selected_venue.website_link,
+        "facebook_link": selected_venue.facebook_link,
+        "seeking_talent": selected_venue.seeking_talent,
+        "seeking_description": selected_venue.seeking_description,
+        "image_link": selected_venue.image_link,
+        "past_shows": past_shows_records,
+        "upcoming_shows": future_shows_records,
+        "past_shows_count": len(past_shows_records),
+        "upcoming_shows_count": len(future_shows_records)
+   }
+
+  return data
+
+def artist_page(artist_id):
+  #Load the artist with all of their shows and venues in one query, leaving
+  #out shows without a start time as venue_page() does
+  selected_artist = Artist.query \
+    .outerjoin(Show, db.and_(Show.artist_id == Artist.id, Show.start_time.isnot(None))) \
+    .outerjoin(Show.venue) \
+    .options(contains_eager(Artist.shows).contains_eager(Show.venue)) \
+    .filter(Artist.id == artist_id) \
+    .order_by(Show.start_time) \
+    .one_or_none()
+
+  if selected_artist is None:
+      abort(404)
+
+  #Lists to store records of past and future shows to build output
+  past_shows_records = []
+  future_shows_records = []
+
+  #Split the shows around a single timestamp so every show lands in exactly one list
+  now = datetime.now()
+  for each_show in selected_artist.shows:
+      record = {
+        "venue_id": each_show.venue_id,
+        "venue_name": each_show.venue.name,
+        "venue_image_link": each_show.venue.image_link,
+        "start_time": each_show.start_time
+      }
+      if each_show.start_time < now:
+          past_shows_records.append(record)
+      else:
+          future_shows_records.append(record)
+
+  data={
+    "id": selected_artist.id,
+    "name": selected_artist.name,
+    "genres": selected_artist.genres,
+    "city": selected_artist.city,
+    "state": selected_artist.state,
+    "phone": selected_artist.phone,
+    "website": selected_artist.website_link,
+    "facebook_link": selected_artist.facebook_link,
+    "seeking_venue": selected_artist.seeking_venue,
+    "seeking_description": selected_artist.seeking_description,
+    "image_link": selected_artist.image_link,
+    "past_shows": past_shows_records,
+    "upcoming_shows": future_shows_records,
+    "past_shows_count": len(past_shows_records),
+    "upcoming_shows_count": len(future_shows_records),
+   }
+
+  return data
+
+def genre_facets(kind):
+  #Maintained on every venue and artist write, so this reads a few dozen rows
+  rows = db.session.query(GenreCount.genre, GenreCount.count) \
+    .filter(GenreCount.kind == kind, GenreCount.count > 0) \
+    .order_by(GenreCount.count.desc(), GenreCount.genre) \
+    .all()
+
+  return [{"genre": row.genre, "count": row.count} for row in rows]
+
+#----------------------------------------------------------------------------#
+# Row versions.
+#----------------------------------------------------------------------------#
+
+def fingerprint(*parts):
+  return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+def table_version(*models):
+  #Changes whenever a row of any of the tables is inserted (count, max id),
+  #updated (sum of versions) or deleted (count)
+  parts = []
+  for model in models:
+      parts.append(tuple(db.session.query(
+          db.func.count(model.id),
+          db.func.max(model.id),
+          db.func.sum(model.version)
+        ).one()))
+  return fingerprint(*parts)
+
+def venue_version(venue_id):
+  #The venue row plus its shows and their artists, whose names appear on the page
+  row = db.session.query(
+      Venue.version,
+      db.func.count(Show.id),
+      db.func.max(Show.id),
+      db.func.sum(Show.version),
+      db.func.sum(Artist.version)
+    ).outerjoin(Show, Show.venue_id == Venue.id) \
+    .outerjoin(Artist, Show.artist_id == Artist.id) \
+    .filter(Venue.id == venue_id) \
+    .group_by(Venue.id) \
+    .one_or_none()
+
+  if row is None:
+      abort(404)
+  return fingerprint('venue', venue_id, tuple(row))
+
+def artist_version(artist_id):
+  #The artist row plus their shows and venues, whose names appear on the page
+  row = db.session.query(
+      Artist.version,
+      db.func.count(Show.id),
+      db.func.max(Show.id),
+      db.func.sum(Show.version),
+      db.func.sum(Venue.version)
+    ).outerjoin(Show, Show.artist_id == Artist.id) \
+    .outerjoin(Venue, Show.venue_id == Venue.id) \
+    .filter(Artist.id == artist_id) \
+    .group_by(Artist.id) \
+    .one_or_none()
+
+  if row is None:
+      abort(404)
+  return fingerprint('artist', artist_id, tuple(row))
@@ -0,0 +1,138 @@
+import itertools
+import threading
+import time
+from functools import wraps
+from flask import current_app, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, exc
+
+#----------------------------------------------------------------------------#
+# Read replica routing.
+#----------------------------------------------------------------------------#
+
+READ_ONLY_KEY = 'fyyur.read_only'
+COMMITTED_KEY = 'fyyur.committed'
+
+# Session cookie key holding the time until which this client reads from the
+# primary, so the page it is redirected to after a write shows that write
+PRIMARY_UNTIL = 'primary_until'
+
+def read_only(view):
+  #Let a view that isn't a GET (e.g. a search form POST) read from a replica
+  @wraps(view)
+  def wrapper(*args, **kwargs):
+      request.environ[READ_ONLY_KEY] = True
+      return view(*args, **kwargs)
+  return wrapper
+
+
+class ReplicaRouting:
+    '''Sends read-only requests to the replicas in SQLALCHEMY_REPLICA_URIS.
+
+    Each replica becomes a Flask-SQLAlchemy bind (so it gets the same pool
+    settings as the primary). Requests take healthy replicas in turn; one that
+    fails to connect is skipped for REPLICA_RETRY_SECONDS, and when none is
+    healthy reads go to the primary.
+    Must be initialized before db.init_app so the binds are created.
+    '''
+
+    def __init__(self, app=None):
+        self.bind_keys = []
+        self.down_until = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['replica_routing'] = self
+        self.retry_seconds = app.config['REPLICA_RETRY_SECONDS']
+        self.read_your_writes_seconds = app.config['REPLICA_READ_YOUR_WRITES_SECONDS']
+
+        binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+        for i, uri in enumerate(app.config['SQLALCHEMY_REPLICA_URIS']):
+            key = f'replica_{i}'
+            binds[key] = uri
+            self.bind_keys.append(key)
+        self._turns = itertools.cycle(self.bind_keys)
+
+        if self.bind_keys:
+            app.after_request(self.remember_write)
+
+    def choose(self, engines):
+        #Next healthy replica engine in round-robin order, or None
+        now = time.monotonic()
+        with self._lock:
+            for _ in self.bind_keys:
+                key = next(self._turns)
+                if self.down_until.get(key, 0) <= now:
+                    return key, engines[key]
+        return None, None
+
+    def mark_down(self, key):
+        with self._lock:
+            self.down_until[key] = time.monotonic() + self.retry_seconds
+        current_app.logger.warning('Replica %s is unavailable; skipping it for %ss', key, self.retry_seconds)
+
+    def status(self):
+        now = time.monotonic()
+        return {key: {"healthy": self.down_until.get(key, 0) <= now,
+                      "retry_in": max(0.0, round(self.down_until.get(key, 0) - now, 1))}
+                for key in self.bind_keys}
+
+    def wants_replica(self, db_session):
+        #Reads go to a replica only inside a read-only request that hasn't
+        #written anything, from a client that hasn't just written
+        if not has_request_context():
+            return False
+        if request.method not in ('GET', 'HEAD') and not request.environ.get(READ_ONLY_KEY):
+            return False
+        if db_session._flushing or db_session.new or db_session.dirty or db_session.deleted:
+            return False
+        return session.get(PRIMARY_UNTIL, 0) <= time.time()
+
+    def remember_write(self, response):
+        if request.environ.get(COMMITTED_KEY):
+            session[PRIMARY_UNTIL] = time.time() + self.read_your_writes_seconds
+        return response
+
+
+class RoutingSession(Session):
+    '''Session that reads from a replica when ReplicaRouting allows it.'''
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        routing = current_app.extensions.get('replica_routing')
+        if bind is None and routing is not None and routing.bind_keys and routing.wants_replica(self):
+            engine = self._replica_engine(routing)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica_engine(self, routing):
+        #Stay on one replica for the whole session; its connection is opened
+        #here so an unreachable replica fails over before the query runs
+        key = self.info.get('replica')
+        if key is not None and routing.down_until.get(key, 0) <= time.monotonic():
+            return self._db.engines[key]
+
+        while True:
+            key, engine = routing.choose(self._db.engines)
+            if engine is None:
+                return None
+            try:
+                self.connection(bind_arguments={'bind': engine})
+            except exc.DBAPIError:
+                routing.mark_down(key)
+                continue
+            self.info['replica'] = key
+            return engine
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def note_commit(db_session):
+  if has_request_context():
+      request.environ[COMMITTED_KEY] = True
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def forget_replica(db_session, transaction):
+  if transaction.parent is None:
+      db_session.info.pop('replica', None)
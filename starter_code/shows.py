@@ -0,0 +1,154 @@
+from flask import Blueprint, abort, current_app, render_template, request, flash, url_for
+from sqlalchemy.exc import IntegrityError
+from models import db, Show
+from queries import show_filters, shows_page, show_end_time, booked_shows
+from views import render_listing, detail_cache
+
+shows_bp = Blueprint('shows', __name__)
+
+#  Shows
+#  ----------------------------------------------------------------
+
+@shows_bp.route('/shows')
+def shows():
+  # displays list of shows at /shows
+  page = {}
+  data = shows_page(page=page, **show_filters(request.args))
+
+  #Called by the template after the rows so it can link to the next page
+  #with the current filters plus the last row's key
+  def next_url():
+      if 'after' not in page:
+          return None
+      args = request.args.to_dict()
+      args.update(after=page['after'][0].isoformat(), after_id=page['after'][1])
+      return url_for('shows.shows', **args)
+
+  return render_listing('pages/shows.html', shows=data, next_url=next_url)
+
+@shows_bp.route('/shows/create')
+def create_shows():
+  # renders form. do not touch.
+  from forms import ShowForm
+  form = ShowForm()
+  return render_template('forms/new_show.html', form=form)
+
+@shows_bp.route('/shows/create', methods=['POST'])
+def create_show_submission():
+  # called to create new shows in the db, upon submitting new show listing form
+  # TODO: insert form data as a new Show record in the db, instead
+  from forms import ShowForm
+  form = ShowForm(request.form, meta={"csrf": False})
+
+  #Check if form is valid
+  if form.validate():
+      start_time = form.start_time.data
+      end_time = show_end_time(start_time, form.end_time.data)
+
+      #The id fields are plain text inputs
+      try:
+          venue_id, artist_id = int(form.venue_id.data), int(form.artist_id.data)
+      except ValueError:
+          flash('Venue and artist IDs must be numbers. Show could not be listed.')
+          return render_template('pages/home.html')
+
+      #Refuse double bookings up front with an index probe per side; the
+      #exclusion constraints still catch two requests racing for the same slot
+      for label, column, row_id in (('venue', Show.venue_id, venue_id), ('artist', Show.artist_id, artist_id)):
+          if booked_shows(column, row_id, start_time, end_time):
+              flash(f'The {label} is already booked at that time. Show could not be listed.')
+              return render_template('pages/home.html')
+
+      #Create new show object
+      newShow = Show(
+        artist_id = artist_id,
+        venue_id = venue_id,
+        start_time = start_time,
+        end_time = end_time
+      )
+
+      try:
+          #Try to add new show object to database and commit change, show message when done.
+          db.session.add(newShow)
+          db.session.commit()
+          detail_cache().invalidate(f'venue:{venue_id}', f'artist:{artist_id}')
+          flash('Show was successfully listed!')
+
+        # On unsuccessful db insert, flash an error instead and rollback session
+      except ValueError as e:
+          current_app.logger.error(e)
+          db.session.rollback()
+          flash('An error occurred.  Show could not be listed. ')
+
+      #23P01 is an exclusion constraint violation: the slot was taken meanwhile
+      except IntegrityError as e:
+          current_app.logger.error(e)
+          db.session.rollback()
+          if '23P01' in (getattr(e.orig, 'sqlstate', None), getattr(e.orig, 'pgcode', None)):
+              flash('The venue or artist is already booked at that time. Show could not be listed.')
+          else:
+              flash('An error occurred.  Show could not be listed. ')
+
+      finally:
+          db.session.close()
+
+  else:
+      #Show why form is not valid to help with debugging
+      flash(form.errors)
+
+
+  return render_template('pages/home.html')
+
+#  Create Show Batch
+#  ----------------------------------------------------------------
+
+def batch_records(formdata):
+  #Group the shows-<n>-<field> inputs into one (n, record) pair per row,
+  #leaving out rows without an artist or venue
+  rows = {}
+  for key, value in formdata.items():
+      prefix, _, rest = key.partition('-')
+      index, _, field = rest.partition('-')
+      if prefix == 'shows' and index.isdigit() and field:
+          rows.setdefault(int(index), {})[field] = value.strip()
+
+  return [(index, rows[index]) for index in sorted(rows)
+          if rows[index].get('artist_id') or rows[index].get('venue_id')]
+
+@shows_bp.route('/shows/create-batch')
+def create_show_batch_form():
+  #?rows= sets how many blank rows the form starts with
+  from forms import ShowBatchForm
+  form = ShowBatchForm()
+  rows = min(request.args.get('rows', 10, type=int), current_app.config['SHOW_BATCH_MAX_ROWS'])
+  while len(form.shows) < rows:
+      form.shows.append_entry()
+  return render_template('forms/new_shows.html', form=form, errors={})
+
+@shows_bp.route('/shows/create-batch', methods=['POST'])
+def create_show_batch_submission():
+  #Every row is validated and checked for double bookings before anything is
+  #written; then all of them are inserted in one statement, or none are
+  from forms import ShowBatchForm
+  from importer import create_show_batch
+
+  records = batch_records(request.form)
+  if len(records) > current_app.config['SHOW_BATCH_MAX_ROWS']:
+      abort(400)
+
+  try:
+      result = create_show_batch(records)
+  finally:
+      db.session.close()
+
+  if result.errors or not result.ids:
+      #Show the rows again as submitted, with each row's errors under it
+      form = ShowBatchForm(request.form, meta={"csrf": False})
+      errors = {}
+      for index, row_errors in result.errors:
+          errors.setdefault(index, []).extend(message for messages in row_errors.values() for message in messages)
+      flash('No shows were listed.' if result.errors else 'Fill in at least one show.')
+      return render_template('forms/new_shows.html', form=form, errors=errors)
+
+  flash(f'{len(result.ids)} shows were successfully listed!')
+  return render_template('pages/home.html')
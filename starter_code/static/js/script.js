@@ -2,3 +2,25 @@ window.parseISOString = function parseISOString(s) {
   var b = s.split(/\D+/);
   return new Date(Date.UTC(b[0], --b[1], b[2], b[3], b[4], b[5], b[6]));
 };
+
+// Type-ahead suggestions for the venue and artist search boxes
+document.addEventListener('input', function (event) {
+  var input = event.target;
+  if (!input.dataset || !input.dataset.autocomplete) return;
+  var query = input.value.trim();
+  var list = document.getElementById(input.getAttribute('list'));
+  if (!query) { list.innerHTML = ''; return; }
+
+  fetch(input.dataset.autocomplete + '?q=' + encodeURIComponent(query))
+    .then(function (response) { return response.json(); })
+    .then(function (data) {
+      // Ignore answers for text the user has since changed
+      if (input.value.trim() !== query) return;
+      list.innerHTML = '';
+      data.results.forEach(function (result) {
+        var option = document.createElement('option');
+        option.value = result.name;
+        list.appendChild(option);
+      });
+    });
+});
@@ -0,0 +1,137 @@
+import gzip
+import json
+from flask import Flask, url_for
+from assets import MANIFEST, StaticAssets, build_assets, fingerprinted
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CSS = b'body { background: url("../img/logo.png"); }\n' + b'.padding { margin: 0; }\n' * 100
+JS = b'console.log("fyyur");\n' * 100
+PNG = b'\x89PNG not really an image'
+
+#----------------------------------------------------------------------------#
+# Fixtures.
+#----------------------------------------------------------------------------#
+
+def write_static(static_folder, files):
+  for name, data in files.items():
+      path = static_folder / name
+      path.parent.mkdir(parents=True, exist_ok=True)
+      path.write_bytes(data)
+
+def make_app(tmp_path, debug=False):
+  app = Flask(__name__, static_folder=str(tmp_path / 'static'))
+  app.config.update(DEBUG=debug, STATIC_BUILD_DIR=str(tmp_path / 'build'), STATIC_MAX_AGE=3600)
+  StaticAssets(app)
+  return app
+
+def build(tmp_path, files):
+  write_static(tmp_path / 'static', files)
+  return build_assets(str(tmp_path / 'static'), str(tmp_path / 'build'))
+
+#----------------------------------------------------------------------------#
+# Build.
+#----------------------------------------------------------------------------#
+
+def test_build_writes_hashed_files_and_manifest(tmp_path):
+  manifest = build(tmp_path, {'css/main.css': CSS, 'js/script.js': JS, 'img/logo.png': PNG})
+
+  assert set(manifest) == {'css/main.css', 'js/script.js', 'img/logo.png'}
+  assert manifest['img/logo.png'] == fingerprinted('img/logo.png', PNG)
+  assert (tmp_path / 'build' / manifest['js/script.js']).read_bytes() == JS
+  assert json.loads((tmp_path / 'build' / MANIFEST).read_text()) == manifest
+
+def test_build_points_css_at_hashed_files(tmp_path):
+  manifest = build(tmp_path, {'css/main.css': CSS, 'img/logo.png': PNG})
+
+  css = (tmp_path / 'build' / manifest['css/main.css']).read_bytes()
+  assert f'url("../{manifest["img/logo.png"]}")'.encode() in css
+  assert manifest['css/main.css'] != fingerprinted('css/main.css', CSS)
+
+def test_build_compresses_text_only(tmp_path):
+  manifest = build(tmp_path, {'js/script.js': JS, 'img/logo.png': PNG})
+  built = tmp_path / 'build'
+
+  assert gzip.decompress((built / (manifest['js/script.js'] + '.gz')).read_bytes()) == JS
+  assert (built / (manifest['js/script.js'] + '.br')).exists() == (brotli is not None)
+  assert not (built / (manifest['img/logo.png'] + '.gz')).exists()
+
+#----------------------------------------------------------------------------#
+# Serving.
+#----------------------------------------------------------------------------#
+
+def test_url_for_returns_hashed_names(tmp_path):
+  manifest = build(tmp_path, {'js/script.js': JS})
+  app = make_app(tmp_path)
+
+  with app.test_request_context():
+      assert url_for('static', filename='js/script.js') == '/static/' + manifest['js/script.js']
+      assert url_for('static', filename='js/other.js') == '/static/js/other.js'
+
+def test_debug_serves_static_folder_as_is(tmp_path):
+  build(tmp_path, {'js/script.js': JS})
+  app = make_app(tmp_path, debug=True)
+
+  with app.test_request_context():
+      assert url_for('static', filename='js/script.js') == '/static/js/script.js'
+  response = app.test_client().get('/static/js/script.js')
+  assert response.data == JS
+  assert not response.cache_control.immutable
+
+def test_hashed_files_are_immutable_and_precompressed(tmp_path):
+  manifest = build(tmp_path, {'js/script.js': JS})
+  client = make_app(tmp_path).test_client()
+  path = '/static/' + manifest['js/script.js']
+
+  response = client.get(path, headers={'Accept-Encoding': 'gzip'})
+  assert response.status_code == 200
+  assert response.headers['Content-Encoding'] == 'gzip'
+  assert gzip.decompress(response.data) == JS
+  assert response.cache_control.immutable and response.cache_control.public
+  assert response.cache_control.max_age == 3600
+  assert 'Accept-Encoding' in response.vary
+  assert response.mimetype in ('application/javascript', 'text/javascript')
+
+  response = client.get(path, headers={'Accept-Encoding': 'gzip, br'})
+  assert response.headers['Content-Encoding'] == ('br' if brotli else 'gzip')
+
+  response = client.get(path, headers={'Accept-Encoding': 'identity'})
+  assert 'Content-Encoding' not in response.headers
+  assert response.data == JS
+
+def test_files_without_variants_are_sent_as_is(tmp_path):
+  manifest = build(tmp_path, {'img/logo.png': PNG})
+  response = make_app(tmp_path).test_client().get('/static/' + manifest['img/logo.png'],
+                                                  headers={'Accept-Encoding': 'gzip, br'})
+  assert response.data == PNG
+  assert 'Content-Encoding' not in response.headers
+  assert 'Accept-Encoding' not in response.vary
+  assert response.cache_control.immutable
+
+def test_earlier_builds_are_still_served(tmp_path):
+  old = build(tmp_path, {'js/script.js': JS})
+  new = build(tmp_path, {'js/script.js': JS + b'//changed\n'})
+  assert old['js/script.js'] != new['js/script.js']
+  client = make_app(tmp_path).test_client()
+
+  for manifest in (old, new):
+      response = client.get('/static/' + manifest['js/script.js'], headers={'Accept-Encoding': 'gzip'})
+      assert response.status_code == 200
+      assert response.headers['Content-Encoding'] == 'gzip'
+      assert response.cache_control.immutable
+
+def test_unbuilt_and_internal_files(tmp_path):
+  manifest = build(tmp_path, {'js/script.js': JS})
+  write_static(tmp_path / 'static', {'extra.txt': b'added after the build'})
+  client = make_app(tmp_path).test_client()
+
+  response = client.get('/static/extra.txt')
+  assert response.data == b'added after the build'
+  assert not response.cache_control.immutable
+
+  assert client.get('/static/' + MANIFEST).status_code == 404
+  assert client.get('/static/' + manifest['js/script.js'] + '.gz').status_code == 404
+  assert client.get('/static/../build/' + MANIFEST).status_code == 404
@@ -0,0 +1,87 @@
+from autocomplete import PrefixIndex, normalize, suffixes
+
+NAMES = [
+  (1, 'The Musical Hop'),
+  (2, 'Park Square Live Music & Coffee'),
+  (3, 'The Dueling Pianos Bar'),
+  (4, 'Musical Chairs'),
+  (5, 'Café Zinc'),
+  (6, 'Parkside'),
+]
+
+#----------------------------------------------------------------------------#
+# Normalizing names.
+#----------------------------------------------------------------------------#
+
+def test_normalize():
+  assert normalize('Café  Zinc & Co.') == 'cafe zinc co'
+  assert normalize('  THE Musical-Hop ') == 'the musical hop'
+  assert normalize('Straße') == 'strasse'
+  assert normalize('') == normalize(None) == ''
+
+def test_suffixes():
+  assert suffixes('park square live') == ['square live', 'live']
+  assert suffixes('parkside') == []
+
+#----------------------------------------------------------------------------#
+# Lookups.
+#----------------------------------------------------------------------------#
+
+def test_search_matches_name_starts_first():
+  index = PrefixIndex(NAMES)
+  assert index.search('park') == [(2, 'Park Square Live Music & Coffee'), (6, 'Parkside')]
+  #Names starting with the prefix rank ahead of later-word matches, each
+  #group in alphabetical order of the matching words
+  assert index.search('mus') == [(4, 'Musical Chairs'), (2, 'Park Square Live Music & Coffee'), (1, 'The Musical Hop')]
+
+def test_search_ignores_case_accents_and_punctuation():
+  index = PrefixIndex(NAMES)
+  assert index.search('CAFE z') == [(5, 'Café Zinc')]
+  assert index.search('music & c') == [(2, 'Park Square Live Music & Coffee')]
+  assert index.search('hop') == [(1, 'The Musical Hop')]
+
+def test_search_matches_across_words():
+  index = PrefixIndex(NAMES)
+  assert index.search('square live m') == [(2, 'Park Square Live Music & Coffee')]
+  assert index.search('square music') == []
+
+def test_search_lists_each_name_once():
+  index = PrefixIndex([(1, 'Live Live Live')])
+  assert index.search('live') == [(1, 'Live Live Live')]
+
+def test_search_limit():
+  index = PrefixIndex(NAMES)
+  assert index.search('mus', limit=2) == [(4, 'Musical Chairs'), (2, 'Park Square Live Music & Coffee')]
+  assert index.search('mus', limit=0) == []
+  assert index.search('', limit=5) == []
+  assert index.search(' & ') == []
+
+#----------------------------------------------------------------------------#
+# Updates.
+#----------------------------------------------------------------------------#
+
+def test_add_rename_and_remove():
+  index = PrefixIndex(NAMES)
+  index.add(7, 'Hop Scotch')
+  assert index.search('hop') == [(7, 'Hop Scotch'), (1, 'The Musical Hop')]
+  assert len(index) == 7
+
+  #Renaming drops every entry of the old name
+  index.add(1, 'The Jazz Cellar')
+  assert index.search('hop') == [(7, 'Hop Scotch')]
+  assert index.search('musical') == [(4, 'Musical Chairs')]
+  assert index.search('jazz') == [(1, 'The Jazz Cellar')]
+  assert len(index) == 7
+
+  index.remove(2)
+  index.remove(404)
+  assert index.search('park') == [(6, 'Parkside')]
+  assert index.search('coffee') == []
+  assert len(index) == 6
+
+def test_load_replaces_contents():
+  index = PrefixIndex(NAMES)
+  index.load([(10, 'New Venue')])
+  assert index.search('park') == []
+  assert index.search('new') == [(10, 'New Venue')]
+  assert len(index) == 1
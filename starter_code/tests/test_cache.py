@@ -0,0 +1,219 @@
+import pytest
+from cache import MISSING, DictClient, LocalCache, ReadThroughCache, SharedCache, cache_from_config
+
+
+class Clock:
+    '''Monotonic clock the tests move forward by hand.'''
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+#----------------------------------------------------------------------------#
+# LocalCache.
+#----------------------------------------------------------------------------#
+
+def test_local_cache_misses_unknown_keys():
+  cache = LocalCache()
+  assert cache.get('venue:1') is MISSING
+
+def test_local_cache_keeps_none():
+  cache = LocalCache()
+  cache.set('venue:1', None)
+  assert cache.get('venue:1') is None
+
+def test_local_cache_evicts_least_recently_used():
+  cache = LocalCache(max_entries=2)
+  cache.set('a', 1)
+  cache.set('b', 2)
+  #Reading 'a' makes 'b' the oldest entry
+  assert cache.get('a') == 1
+  cache.set('c', 3)
+
+  assert cache.get('b') is MISSING
+  assert cache.get('a') == 1
+  assert cache.get('c') == 3
+
+def test_local_cache_overwrite_refreshes_recency():
+  cache = LocalCache(max_entries=2)
+  cache.set('a', 1)
+  cache.set('b', 2)
+  cache.set('a', 10)
+  cache.set('c', 3)
+
+  assert cache.get('a') == 10
+  assert cache.get('b') is MISSING
+
+def test_local_cache_expires_after_ttl():
+  clock = Clock()
+  cache = LocalCache(ttl=60, clock=clock)
+  cache.set('a', 1)
+
+  clock.now += 59
+  assert cache.get('a') == 1
+  clock.now += 1
+  assert cache.get('a') is MISSING
+  assert len(cache._entries) == 0
+
+def test_local_cache_delete_and_clear():
+  cache = LocalCache()
+  cache.set('a', 1)
+  cache.set('b', 2)
+  cache.delete('a')
+  cache.delete('missing')
+  assert cache.get('a') is MISSING
+  assert cache.get('b') == 2
+
+  cache.clear()
+  assert cache.get('b') is MISSING
+
+#----------------------------------------------------------------------------#
+# SharedCache.
+#----------------------------------------------------------------------------#
+
+def test_shared_cache_round_trips_values():
+  cache = SharedCache(DictClient())
+  value = {'id': 1, 'name': 'The Musical Hop', 'genres': ['Jazz']}
+  cache.set('venue:1', value)
+
+  assert cache.get('venue:1') == value
+  assert cache.get('venue:2') is MISSING
+
+def test_shared_cache_returns_copies():
+  cache = SharedCache(DictClient())
+  cache.set('venue:1', {'genres': ['Jazz']})
+  cache.get('venue:1')['genres'].append('Folk')
+
+  assert cache.get('venue:1') == {'genres': ['Jazz']}
+
+def test_shared_cache_namespaces_keys():
+  client = DictClient()
+  cache = SharedCache(client, prefix='test:')
+  cache.set('venue:1', 1)
+  client.set('other:venue:1', b'unrelated')
+
+  assert client.get('test:venue:1') is not None
+  cache.clear()
+  assert cache.get('venue:1') is MISSING
+  assert client.get('other:venue:1') == b'unrelated'
+
+def test_shared_cache_expires_after_ttl():
+  clock = Clock()
+  cache = SharedCache(DictClient(clock=clock), ttl=30)
+  cache.set('a', 1)
+
+  clock.now += 29
+  assert cache.get('a') == 1
+  clock.now += 1
+  assert cache.get('a') is MISSING
+
+def test_shared_cache_invalidation_seen_by_every_worker():
+  client = DictClient()
+  first, second = SharedCache(client), SharedCache(client)
+  first.set('venue:1', 'old')
+  assert second.get('venue:1') == 'old'
+
+  second.delete('venue:1')
+  assert first.get('venue:1') is MISSING
+
+def test_dict_client_without_expiry():
+  clock = Clock()
+  client = DictClient(clock=clock)
+  client.set('a', b'1')
+  clock.now += 10 ** 6
+
+  assert client.get('a') == b'1'
+  client.delete('a', 'b')
+  assert client.get('a') is None
+
+#----------------------------------------------------------------------------#
+# ReadThroughCache.
+#----------------------------------------------------------------------------#
+
+def test_read_through_loads_once():
+  cache = ReadThroughCache(LocalCache())
+  calls = []
+
+  def load():
+    calls.append(1)
+    return {'id': 1}
+
+  assert cache.get_or_load('venue:1', load) == {'id': 1}
+  assert cache.get_or_load('venue:1', load) == {'id': 1}
+  assert len(calls) == 1
+  assert (cache.hits, cache.misses) == (1, 1)
+
+def test_read_through_caches_none():
+  cache = ReadThroughCache(LocalCache())
+  calls = []
+
+  def load():
+    calls.append(1)
+
+  cache.get_or_load('venue:404', load)
+  cache.get_or_load('venue:404', load)
+  assert len(calls) == 1
+
+def test_read_through_invalidate_reloads():
+  cache = ReadThroughCache(SharedCache(DictClient()))
+  cache.get_or_load('venue:1', lambda: 'old')
+  cache.invalidate('venue:1', 'artist:2')
+
+  assert cache.get_or_load('venue:1', lambda: 'new') == 'new'
+  assert cache.invalidations == 2
+  assert (cache.hits, cache.misses) == (0, 2)
+
+def test_read_through_stats():
+  cache = ReadThroughCache(LocalCache())
+  assert cache.stats()['hit_ratio'] == 0.0
+
+  cache.get_or_load('a', lambda: 1)
+  cache.get_or_load('a', lambda: 1)
+  cache.get_or_load('a', lambda: 1)
+  cache.get_or_load('b', lambda: 2)
+  assert cache.stats() == {
+    "backend": 'LocalCache',
+    "hits": 2,
+    "misses": 2,
+    "invalidations": 0,
+    "hit_ratio": 0.5
+  }
+
+def test_read_through_clear():
+  cache = ReadThroughCache(LocalCache())
+  cache.get_or_load('a', lambda: 1)
+  cache.clear()
+  assert cache.get_or_load('a', lambda: 2) == 2
+
+#----------------------------------------------------------------------------#
+# Configuration.
+#----------------------------------------------------------------------------#
+
+CONFIG = {
+  'DETAIL_CACHE_BACKEND': 'local',
+  'DETAIL_CACHE_URL': None,
+  'DETAIL_CACHE_TTL': 45,
+  'DETAIL_CACHE_LOCAL_TTL': 5,
+  'DETAIL_CACHE_MAX_ENTRIES': 8
+}
+
+def test_cache_from_config_local():
+  local = cache_from_config(dict(CONFIG, DEBUG=True)).backend
+  assert isinstance(local, LocalCache)
+  assert (local.ttl, local.max_entries) == (45, 8)
+
+def test_cache_from_config_local_ttl_capped_in_production():
+  #Other workers never hear of this process's invalidations
+  assert cache_from_config(CONFIG).backend.ttl == 5
+  assert cache_from_config(dict(CONFIG, TESTING=True)).backend.ttl == 45
+
+def test_cache_from_config_shared_stand_in_only_in_development():
+  shared = cache_from_config(dict(CONFIG, DETAIL_CACHE_BACKEND='shared', DEBUG=True)).backend
+  assert isinstance(shared, SharedCache)
+  assert isinstance(shared.client, DictClient)
+  assert shared.ttl == 45
+
+  with pytest.raises(RuntimeError):
+      cache_from_config(dict(CONFIG, DETAIL_CACHE_BACKEND='shared'))
@@ -0,0 +1,122 @@
+import gzip
+import json
+import pytest
+from flask import Flask, Response, jsonify, request
+from compression import Compression, brotli_available
+
+BIG = {"venues": [{"id": i, "name": f"Venue {i}"} for i in range(200)]}
+
+def make_app(**config):
+  app = Flask(__name__)
+  app.config.update(
+    COMPRESS_ENABLED=True,
+    COMPRESS_MIMETYPES=['text/html', 'application/json'],
+    COMPRESS_MIN_SIZE=500,
+    COMPRESS_GZIP_LEVEL=6,
+    COMPRESS_BROTLI_LEVEL=4,
+    COMPRESS_STREAMS=True,
+    COMPRESS_STREAM_BUFFER=64
+  )
+  app.config.update(config)
+  Compression(app)
+
+  @app.route('/big')
+  def big():
+    #Answers like api.conditional_json
+    if request.if_none_match.contains_weak('v1'):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(BIG)
+    response.set_etag('v1')
+    return response
+
+  @app.route('/small')
+  def small():
+    return jsonify({"ok": True})
+
+  @app.route('/stream')
+  def stream():
+    return Response((f'<tr><td>{i}</td></tr>\n' for i in range(100)), mimetype='text/html')
+
+  @app.route('/image')
+  def image():
+    return Response(b'x' * 1000, mimetype='image/png')
+
+  return app
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+#----------------------------------------------------------------------------#
+# Bodies.
+#----------------------------------------------------------------------------#
+
+def test_buffered_response_is_gzipped():
+  response = make_app().test_client().get('/big', headers=GZIP)
+  assert response.headers['Content-Encoding'] == 'gzip'
+  assert 'Accept-Encoding' in response.vary
+  assert json.loads(gzip.decompress(response.data)) == BIG
+  assert int(response.headers['Content-Length']) == len(response.data)
+
+@pytest.mark.skipif(not brotli_available(), reason='brotli is not installed')
+def test_brotli_preferred_when_accepted():
+  import brotli
+  response = make_app().test_client().get('/big', headers={'Accept-Encoding': 'gzip, br'})
+  assert response.headers['Content-Encoding'] == 'br'
+  assert json.loads(brotli.decompress(response.data)) == BIG
+
+def test_uncompressed_without_accept_encoding():
+  response = make_app().test_client().get('/big', headers={'Accept-Encoding': 'identity'})
+  assert 'Content-Encoding' not in response.headers
+  assert 'Accept-Encoding' in response.vary
+  assert response.json == BIG
+  assert response.get_etag() == ('v1', False)
+
+def test_small_bodies_sent_as_is():
+  response = make_app().test_client().get('/small', headers=GZIP)
+  assert 'Content-Encoding' not in response.headers
+  assert response.json == {"ok": True}
+
+def test_other_mimetypes_sent_as_is():
+  response = make_app().test_client().get('/image', headers=GZIP)
+  assert 'Content-Encoding' not in response.headers
+  assert 'Accept-Encoding' not in response.vary
+
+def test_streamed_response_compressed_as_sent():
+  client = make_app().test_client()
+  plain = client.get('/stream').data
+
+  response = client.get('/stream', headers=GZIP)
+  assert response.headers['Content-Encoding'] == 'gzip'
+  assert 'Content-Length' not in response.headers
+  assert gzip.decompress(response.data) == plain
+
+def test_streams_left_alone_when_disabled():
+  response = make_app(COMPRESS_STREAMS=False).test_client().get('/stream', headers=GZIP)
+  assert 'Content-Encoding' not in response.headers
+
+#----------------------------------------------------------------------------#
+# Validators.
+#----------------------------------------------------------------------------#
+
+def test_compressed_response_has_weak_etag():
+  response = make_app().test_client().get('/big', headers=GZIP)
+  assert response.get_etag() == ('v1', True)
+
+def test_not_modified_carries_the_same_etag():
+  client = make_app().test_client()
+  full = client.get('/big', headers=GZIP)
+
+  response = client.get('/big', headers=dict(GZIP, **{'If-None-Match': full.headers['ETag']}))
+  assert response.status_code == 304
+  assert response.headers['ETag'] == full.headers['ETag'] == 'W/"v1"'
+  assert 'Accept-Encoding' in response.vary
+  assert 'Content-Encoding' not in response.headers
+
+def test_head_carries_the_same_etag():
+  client = make_app().test_client()
+  assert client.head('/big', headers=GZIP).headers['ETag'] == client.get('/big', headers=GZIP).headers['ETag']
+
+def test_disabled():
+  response = make_app(COMPRESS_ENABLED=False).test_client().get('/big', headers=GZIP)
+  assert 'Content-Encoding' not in response.headers
+  assert response.get_etag() == ('v1', False)
@@ -0,0 +1,191 @@
+import sqlite3
+from flask import Flask, redirect, request
+from flask_sqlalchemy import SQLAlchemy
+from routing import PRIMARY_UNTIL, ReplicaRouting, RoutingSession, read_only
+
+#----------------------------------------------------------------------------#
+# Fixtures.
+#----------------------------------------------------------------------------#
+
+def database(path, name):
+  #A SQLite file that answers "which database is this?"
+  with sqlite3.connect(path) as connection:
+      connection.execute('CREATE TABLE whoami (name TEXT)')
+      connection.execute('CREATE TABLE notes (body TEXT)')
+      connection.execute('INSERT INTO whoami VALUES (?)', (name,))
+  return f'sqlite:///{path}'
+
+def make_app(tmp_path, replicas=('replica_a', 'replica_b'), unreachable=()):
+  #Primary and replicas are separate SQLite files; unreachable replicas point
+  #into a directory that doesn't exist, so connecting to them fails
+  app = Flask(__name__)
+  app.config.update(
+    SECRET_KEY='test',
+    SQLALCHEMY_DATABASE_URI=database(tmp_path / 'primary.db', 'primary'),
+    SQLALCHEMY_REPLICA_URIS=[
+      f'sqlite:///{tmp_path}/missing/{name}.db' if name in unreachable else database(tmp_path / f'{name}.db', name)
+      for name in replicas
+    ],
+    REPLICA_RETRY_SECONDS=30,
+    REPLICA_READ_YOUR_WRITES_SECONDS=5
+  )
+  routing = ReplicaRouting(app)
+  db = SQLAlchemy(session_options={'class_': RoutingSession})
+  db.init_app(app)
+
+  def who():
+    return db.session.execute(db.text('SELECT name FROM whoami')).scalar()
+
+  @app.route('/who', methods=['GET', 'POST'])
+  def read():
+    return who()
+
+  @app.route('/search', methods=['POST'])
+  @read_only
+  def search():
+    return who()
+
+  @app.route('/notes', methods=['POST'])
+  def write():
+    db.session.execute(db.text('INSERT INTO notes VALUES (:body)'), {'body': request.form['body']})
+    db.session.commit()
+    return redirect('/who')
+
+  @app.route('/post-who', methods=['POST'])
+  def write_then_read():
+    db.session.execute(db.text('INSERT INTO notes VALUES (:body)'), {'body': 'x'})
+    db.session.flush()
+    return who()
+
+  @app.teardown_appcontext
+  def close(exception):
+    db.session.remove()
+
+  return app, routing
+
+class Engines(dict):
+    '''Stand-in for db.engines that hands back the bind key as the engine.'''
+
+    def __missing__(self, key):
+        return key
+
+#----------------------------------------------------------------------------#
+# Choosing a replica.
+#----------------------------------------------------------------------------#
+
+def test_choose_round_robin(tmp_path):
+  app, routing = make_app(tmp_path, replicas=('a', 'b', 'c'))
+  chosen = [routing.choose(Engines())[0] for _ in range(6)]
+  assert chosen == ['replica_0', 'replica_1', 'replica_2'] * 2
+
+def test_mark_down_skips_replica_until_retry(tmp_path, monkeypatch):
+  app, routing = make_app(tmp_path)
+  now = [1000.0]
+  monkeypatch.setattr('routing.time.monotonic', lambda: now[0])
+
+  with app.app_context():
+      routing.mark_down('replica_0')
+  assert [routing.choose(Engines())[0] for _ in range(3)] == ['replica_1'] * 3
+  assert routing.status() == {
+    'replica_0': {"healthy": False, "retry_in": 30.0},
+    'replica_1': {"healthy": True, "retry_in": 0.0}
+  }
+
+  now[0] += 30
+  assert {routing.choose(Engines())[0] for _ in range(2)} == {'replica_0', 'replica_1'}
+
+def test_choose_none_when_all_down(tmp_path):
+  app, routing = make_app(tmp_path)
+  with app.app_context():
+      for key in routing.bind_keys:
+          routing.mark_down(key)
+  assert routing.choose(Engines()) == (None, None)
+
+#----------------------------------------------------------------------------#
+# Which requests read from a replica.
+#----------------------------------------------------------------------------#
+
+def test_reads_go_to_replicas_in_turn(tmp_path):
+  app, _ = make_app(tmp_path)
+  client = app.test_client()
+  assert [client.get('/who').text for _ in range(4)] == ['replica_a', 'replica_b'] * 2
+
+def test_post_reads_from_primary_unless_read_only(tmp_path):
+  app, _ = make_app(tmp_path)
+  client = app.test_client()
+  assert client.post('/who').text == 'primary'
+  assert client.post('/search').text.startswith('replica_')
+
+def test_session_with_pending_writes_reads_from_primary(tmp_path):
+  app, _ = make_app(tmp_path)
+  assert app.test_client().post('/post-who').text == 'primary'
+
+def test_no_replicas_reads_from_primary(tmp_path):
+  app, routing = make_app(tmp_path, replicas=())
+  assert routing.bind_keys == []
+  assert app.test_client().get('/who').text == 'primary'
+
+def test_outside_requests_use_primary(tmp_path):
+  app, routing = make_app(tmp_path)
+  with app.app_context():
+      assert routing.wants_replica(None) is False
+
+#----------------------------------------------------------------------------#
+# Read-your-writes.
+#----------------------------------------------------------------------------#
+
+def test_write_and_redirect_read_from_primary(tmp_path):
+  app, _ = make_app(tmp_path)
+  client = app.test_client()
+  response = client.post('/notes', data={'body': 'hello'}, follow_redirects=True)
+
+  #The write went to the primary, and so did the page it redirected to
+  assert response.text == 'primary'
+  with sqlite3.connect(tmp_path / 'primary.db') as connection:
+      assert connection.execute('SELECT body FROM notes').fetchall() == [('hello',)]
+  assert client.get('/who').text == 'primary'
+
+def test_read_your_writes_window_expires(tmp_path):
+  app, _ = make_app(tmp_path)
+  client = app.test_client()
+  client.post('/notes', data={'body': 'hello'})
+  with client.session_transaction() as cookie:
+      assert PRIMARY_UNTIL in cookie
+      cookie[PRIMARY_UNTIL] = 0
+
+  assert client.get('/who').text.startswith('replica_')
+
+def test_other_clients_keep_reading_replicas(tmp_path):
+  app, _ = make_app(tmp_path)
+  app.test_client().post('/notes', data={'body': 'hello'})
+  assert app.test_client().get('/who').text.startswith('replica_')
+
+#----------------------------------------------------------------------------#
+# Failover.
+#----------------------------------------------------------------------------#
+
+def test_unreachable_replica_fails_over(tmp_path):
+  app, routing = make_app(tmp_path, unreachable=('replica_a',))
+  client = app.test_client()
+
+  assert [client.get('/who').text for _ in range(3)] == ['replica_b'] * 3
+  assert routing.status()['replica_0']['healthy'] is False
+  assert routing.status()['replica_1']['healthy'] is True
+
+def test_all_replicas_unreachable_fall_back_to_primary(tmp_path):
+  app, routing = make_app(tmp_path, unreachable=('replica_a', 'replica_b'))
+  assert app.test_client().get('/who').text == 'primary'
+  assert not any(state['healthy'] for state in routing.status().values())
+
+def test_request_stays_on_one_replica(tmp_path):
+  app, _ = make_app(tmp_path)
+
+  @app.route('/twice')
+  def twice():
+    db = app.extensions['sqlalchemy']
+    first = db.session.execute(db.text('SELECT name FROM whoami')).scalar()
+    second = db.session.execute(db.text('SELECT name FROM whoami')).scalar()
+    return f'{first} {second}'
+
+  first, second = app.test_client().get('/twice').text.split()
+  assert first == second != 'primary'
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+from werkzeug.datastructures import MultiDict
+import importer
+from importer import booking_conflicts, scalar_errors, valid_keys
+from shows import batch_records
+
+EIGHT_PM = datetime(2031, 5, 1, 20, 0)
+
+def show(venue_id, artist_id, start, hours=2):
+  return {'venue_id': venue_id, 'artist_id': artist_id, 'start_time': start, 'end_time': start + timedelta(hours=hours)}
+
+def calendar(monkeypatch, shows):
+  #Stand in for the bookings query, recording what it was asked for
+  asked = []
+  def bookings(venue_ids, artist_ids, start, end):
+    asked.append((venue_ids, artist_ids, start, end))
+    return shows
+  monkeypatch.setattr(importer, 'bookings', bookings)
+  return asked
+
+#----------------------------------------------------------------------------#
+# Form rows.
+#----------------------------------------------------------------------------#
+
+def test_batch_records_groups_rows_in_order():
+  formdata = MultiDict([
+    ('shows-1-artist_id', ' 7 '), ('shows-1-venue_id', '3'), ('shows-1-start_time', '2031-05-01 20:00'),
+    ('shows-0-artist_id', '5'), ('shows-0-venue_id', '2'), ('shows-0-start_time', '2031-05-02 20:00'),
+    ('shows-10-artist_id', '9'), ('shows-10-venue_id', '4'),
+  ])
+  assert batch_records(formdata) == [
+    (0, {'artist_id': '5', 'venue_id': '2', 'start_time': '2031-05-02 20:00'}),
+    (1, {'artist_id': '7', 'venue_id': '3', 'start_time': '2031-05-01 20:00'}),
+    (10, {'artist_id': '9', 'venue_id': '4'}),
+  ]
+
+def test_batch_records_skips_blank_rows_and_other_fields():
+  formdata = MultiDict([
+    ('csrf_token', 'x'), ('shows-0-start_time', '2031-05-01 20:00'),
+    ('shows-1-artist_id', ''), ('shows-1-venue_id', ' '),
+    ('shows-x-artist_id', '1'), ('shows-2', '1'), ('other-3-artist_id', '1'),
+    ('shows-4-venue_id', '8'),
+  ])
+  assert batch_records(formdata) == [(4, {'venue_id': '8'})]
+
+#----------------------------------------------------------------------------#
+# Record checks.
+#----------------------------------------------------------------------------#
+
+def test_scalar_errors():
+  assert scalar_errors({'artist_id': 1, 'venue_name': 'Hop', 'genres': ['Jazz'], 'start_time': None}) == {}
+  assert scalar_errors({'artist_id': [1], 'venue_name': {'name': 'Hop'}, 'venue_id': 2}) == {
+    'artist_id': ['Must be a single value.'],
+    'venue_name': ['Must be a single value.']
+  }
+
+def test_valid_keys():
+  records = [(0, {}), (1, {}), (2, {}), (5, {})]
+  assert valid_keys(records, [(1, {'artist_id': ['x']}), (5, {'venue_id': ['y']})]) == [0, 2]
+
+#----------------------------------------------------------------------------#
+# Double bookings.
+#----------------------------------------------------------------------------#
+
+def test_booking_conflicts_empty_batch(monkeypatch):
+  asked = calendar(monkeypatch, [])
+  assert booking_conflicts([]) == []
+  assert asked == []
+
+def test_booking_conflicts_with_existing_shows(monkeypatch):
+  asked = calendar(monkeypatch, [dict(show(1, 10, EIGHT_PM), id=99)])
+  rows = [
+    ('a', show(1, 11, EIGHT_PM + timedelta(hours=1))),
+    ('b', show(2, 10, EIGHT_PM - timedelta(hours=1))),
+    ('c', show(1, 12, EIGHT_PM + timedelta(hours=2))),
+    ('d', show(1, 10, EIGHT_PM)),
+  ]
+  assert booking_conflicts(rows) == [
+    ('a', {'start_time': ['The venue is already booked at that time.']}),
+    ('b', {'start_time': ['The artist is already booked at that time.']}),
+    ('d', {'start_time': ['The venue is already booked at that time.',
+                          'The artist is already booked at that time.']}),
+  ]
+  #One query covering every venue, artist and the whole span of the batch
+  assert asked == [({1, 2}, {10, 11, 12}, EIGHT_PM - timedelta(hours=1), EIGHT_PM + timedelta(hours=4))]
+
+def test_booking_conflicts_within_batch(monkeypatch):
+  calendar(monkeypatch, [])
+  rows = [
+    (0, show(1, 10, EIGHT_PM)),
+    (1, show(1, 11, EIGHT_PM + timedelta(minutes=30))),
+    (2, show(2, 11, EIGHT_PM + timedelta(minutes=30))),
+    (3, show(3, 11, EIGHT_PM + timedelta(hours=1))),
+  ]
+  #Row 1 is rejected, so only accepted rows (0 and 2) block later ones
+  assert booking_conflicts(rows) == [
+    (1, {'start_time': ['The venue is already booked at that time.']}),
+    (3, {'start_time': ['The artist is already booked at that time.']}),
+  ]
+
+def test_back_to_back_shows_do_not_conflict(monkeypatch):
+  calendar(monkeypatch, [dict(show(1, 10, EIGHT_PM), id=99)])
+  assert booking_conflicts([(0, show(1, 10, EIGHT_PM + timedelta(hours=2)))]) == []
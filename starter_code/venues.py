@@ -0,0 +1,171 @@
+from flask import Blueprint, current_app, render_template, request, flash, redirect, url_for
+from models import db, Venue
+from queries import venue_areas, search_by_name, venue_page, genre_filters, genre_facets
+from routing import read_only
+from views import render_listing, detail_cache, invalidate_venue
+
+venues_bp = Blueprint('venues', __name__)
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@venues_bp.route('/venues')
+def venues():
+  #Venues are grouped by area with their upcoming show counts in one query,
+  #optionally narrowed with ?genre=
+  return render_listing('pages/venues.html', areas=venue_areas(**genre_filters(request.args)),
+                        facets=genre_facets('venues'))
+
+@venues_bp.route('/venues/search', methods=['POST'])
+@read_only
+def search_venues():
+  #Case-insensitive partial match, e.g. "Music" finds "The Musical Hop" and
+  #"Park Square Live Music & Coffee", ordered by trigram similarity
+  search_term = request.form.get('search_term', '')
+  response = search_by_name(Venue, search_term, **genre_filters(request.values))
+
+  return render_template('pages/search_venues.html', results=response, search_term=search_term)
+
+@venues_bp.route('/venues/<int:venue_id>', methods=['GET'])
+def show_venue(venue_id):
+  # shows the venue page with the given venue_id
+  data = detail_cache().get_or_load(f'venue:{venue_id}', lambda: venue_page(venue_id))
+  return render_template('pages/show_venue.html', venue=data)
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@venues_bp.route('/venues/create', methods=['GET'])
+def create_venue_form():
+  from forms import VenueForm
+  form = VenueForm()
+  return render_template('forms/new_venue.html', form=form)
+
+@venues_bp.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+  # TODO: insert form data as a new Venue record in the db, instead
+  # TODO: modify data to be the data object returned from db insertion
+  from forms import VenueForm
+  form = VenueForm(request.form, meta={"csrf": False})
+
+  #Check if data on form is valid
+  if form.validate():
+      #Create new venue object
+      newVenue = Venue(
+        name = form.name.data,
+        city = form.city.data,
+        state = form.state.data,
+        address = form.address.data,
+        phone = form.phone.data,
+        genres = form.genres.data,
+        image_link = form.image_link.data,
+        facebook_link = form.facebook_link.data,
+        website_link = form.website_link.data,
+        seeking_talent = form.seeking_talent.data,
+        seeking_description = form.seeking_description.data
+        )
+  #Try to insert venue into database and commit change, send message when done
+      try:
+          db.session.add(newVenue)
+          db.session.commit()
+          flash('Venue ' + form.name.data + ' was successfully listed!')
+
+  #On unsuccessful db insert, flash an error instead
+      except ValueError as e:
+          current_app.logger.error(e)
+          db.session.rollback()
+          flash('An error occurred. Venue ' + form.name.data + ' could not be listed. ')
+
+      finally:
+          db.session.close()
+  else:
+        #Whow errors if there was a problem with invalid data to help with debugging
+        flash(form.errors)
+
+  return render_template('pages/home.html')
+
+@venues_bp.route('/venues/<int:venue_id>/delete', methods=['DELETE'])
+def delete_venue(venue_id):
+  # TODO: Complete this endpoint for taking a venue_id, and using
+  # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
+
+  # BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
+  # clicking that button delete it from the db then redirect the user to the homepage
+  try:
+      venue = Venue.query.get(venue_id)
+      db.session.delete(venue)
+      db.session.commit()
+      detail_cache().invalidate(f'venue:{venue_id}')
+      flash("Venue deleted.")
+  except:
+      db.session.rollback()
+      flash('An error occurred. Venue could not be deleted')
+  finally:
+      db.session.close()
+
+
+  return render_template('pages/home.html')
+
+#  Update
+#  ----------------------------------------------------------------
+
+@venues_bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+  from forms import VenueForm
+
+  form = VenueForm(request.form, meta={"csrf": False})
+  venue = Venue.query.get(venue_id)
+
+  # TODO: populate form with values from venue with ID <venue_id>
+  form.name.data = venue.name
+  form.genres.data = venue.genres
+  form.address.data = venue.address
+  form.city.data = venue.city
+  form.state.data = venue.state
+  form.phone.data = venue.phone
+  form.website_link.data = venue.website_link
+  form.facebook_link.data = venue.facebook_link
+  form.seeking_talent.data = venue.seeking_talent
+  form.seeking_description.data = venue.seeking_description
+  form.image_link.data = venue.image_link
+
+  return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+@venues_bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+  # TODO: take values from the form submitted, and update existing
+  # venue record with ID <venue_id> using the new attributes
+  from forms import VenueForm
+  form = VenueForm(request.form, meta={"csrf": False})
+
+  if form.validate():
+      venue = Venue.query.get(venue_id)
+
+      venue.name = form.name.data
+      venue.genres = form.genres.data
+      venue.address = form.address.data
+      venue.city = form.city.data
+      venue.state = form.state.data
+      venue.phone = form.phone.data
+      venue.website_link = form.website_link.data
+      venue.facebook_link = form.facebook_link.data
+      venue.seeking_talent = form.seeking_talent.data
+      venue.seeking_description = form.seeking_description.data
+      venue.image_link = form.image_link.data
+      try:
+             db.session.commit()
+             invalidate_venue(venue_id)
+
+     # On unsuccessful db insert, flash an error instead and rollback session
+      except ValueError as e:
+             current_app.logger.error(e)
+             db.session.rollback()
+             flash('An error occurred. Venue could not be updated. ')
+
+      finally:
+             db.session.close()
+  else:
+           #Show errors if form is not valid to help with debugging
+           flash(form.errors)
+
+  return redirect(url_for('venues.show_venue', venue_id=venue_id))
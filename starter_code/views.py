@@ -0,0 +1,26 @@
+from flask import current_app, render_template, stream_template
+from models import db, Show
+
+#----------------------------------------------------------------------------#
+# Helpers shared by the page blueprints.
+#----------------------------------------------------------------------------#
+
+def render_listing(template_name, **context):
+  #Stream list pages so rows are rendered as they are read from the server-side
+  #cursor instead of building the whole page in memory first
+  if current_app.config['STREAM_LIST_PAGES']:
+      return stream_template(template_name, **context)
+  return render_template(template_name, **context)
+
+def detail_cache():
+  return current_app.extensions['detail_cache']
+
+def invalidate_venue(venue_id):
+  #Artist pages show the venue's name and image, so theirs go stale too
+  artist_ids = db.session.query(Show.artist_id).filter(Show.venue_id == venue_id).distinct()
+  detail_cache().invalidate(f'venue:{venue_id}', *[f'artist:{row.artist_id}' for row in artist_ids])
+
+def invalidate_artist(artist_id):
+  #Venue pages show the artist's name and image, so theirs go stale too
+  venue_ids = db.session.query(Show.venue_id).filter(Show.artist_id == artist_id).distinct()
+  detail_cache().invalidate(f'artist:{artist_id}', *[f'venue:{row.venue_id}' for row in venue_ids])